@@ -2,19 +2,90 @@
 #
 # Copyright (c) 2020 Fistro Co.
 
+import argparse
 import tkinter
 
+from ovn_viewer import connection
+from ovn_viewer import constants
+from ovn_viewer import dbfile
+from ovn_viewer import instrumentation
+from ovn_viewer import snapshot
 from ovn_viewer import viewer
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='OVN tree viewer')
+    parser.add_argument(
+        '--cluster', nargs=3, action='append', default=[],
+        metavar=('NAME', 'NB_CONNECTION', 'SB_CONNECTION'),
+        help='Open this cluster in a tab (can be repeated); the connections '
+             'can have several comma separated remotes, e.g. the RAFT '
+             'cluster members. By default, %s and %s' %
+             (constants.OVN_NB_CONNECTION, constants.OVN_SB_CONNECTION))
+    parser.add_argument(
+        '--scope-uuid', action='append', default=[], metavar='UUID',
+        help='Monitor only this Logical_Switch or Port_Group and its '
+             'children (can be repeated)')
+    parser.add_argument(
+        '--scope-filter', action='append', default=[], metavar='KEY=VALUE',
+        help='Monitor only the Logical_Switch and Port_Group rows with this '
+             '"external_ids" value, e.g. neutron:network_name=private (can '
+             'be repeated, all must match)')
+    parser.add_argument(
+        '--snapshot', metavar='PATH',
+        help='Browse a saved snapshot, without connecting to OVN')
+    parser.add_argument(
+        '--db-file', metavar='PATH',
+        help='Browse a NB database file (standalone or clustered) or an '
+             '"ovsdb-client dump --format=json" output, without connecting '
+             'to OVN')
+    parser.add_argument(
+        '--schema', metavar='PATH',
+        help='NB database schema, needed to read a JSON dump')
+    parser.add_argument(
+        '--refresh-interval', type=int, metavar='MS',
+        default=constants.NOTIFICATION_INTERVAL,
+        help='Apply the IDL events received at most once per interval, in '
+             'milliseconds (default: %(default)s)')
+    parser.add_argument(
+        '--diagnostics', action='store_true',
+        help='Record the timings of the connections, the tree building and '
+             'the IDL events lag (see the "Diagnostics" menu)')
+    parser.add_argument(
+        '--diagnostics-log', metavar='PATH',
+        help='Write the recorded timings periodically to this file, as JSON '
+             'lines; implies --diagnostics')
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    instrumentation.RECORDER.enabled = bool(args.diagnostics or
+                                            args.diagnostics_log)
+    diagnostics_log = None
+    if args.diagnostics_log:
+        diagnostics_log = open(args.diagnostics_log, 'a')
+    scope = connection.MonitorScope.from_filters(uuids=args.scope_uuid,
+                                                 filters=args.scope_filter)
+    offline_db = None
+    if args.snapshot:
+        offline_db = snapshot.Snapshot.load(args.snapshot)
+    elif args.db_file:
+        offline_db = dbfile.load(args.db_file, schema_path=args.schema)
     master_window = tkinter.Tk()
     # Full SVGA resolution, welcome to the future
     master_window.minsize(800, 600)
     master_window.title('OVN tree viewer')
-    _viewer = viewer.OvnViewer(master_window)
+    clusters = [connection.Cluster(*cluster) for cluster in args.cluster]
+    _viewer = viewer.OvnViewer(master_window, clusters=clusters, scope=scope,
+                               offline_db=offline_db,
+                               offline_name=args.snapshot or args.db_file,
+                               diagnostics_log=diagnostics_log,
+                               refresh_interval=args.refresh_interval)
     _viewer.init_ui()
     master_window.mainloop()
+    if diagnostics_log:
+        diagnostics_log.close()
 
 
 if __name__ == '__main__':
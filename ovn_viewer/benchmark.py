@@ -0,0 +1,298 @@
+# Copyright (c) 2020 Fistro Co.
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+import uuid as uuidlib
+
+from ovn_viewer import constants
+from ovn_viewer import headless
+from ovn_viewer import notifications
+from ovn_viewer import snapshot
+from ovn_viewer import treetypes
+
+
+class FakeNorthbound(snapshot.Snapshot):
+    """Synthetic NB database, read by the tree like the IDL
+
+    The rows are generated with a fixed seed, thus two runs with the same
+    shape use the same data.
+    """
+
+    def __init__(self, switches, ports, qos, port_groups, acls, seed=0):
+        super(FakeNorthbound, self).__init__()
+        self._random = random.Random(seed)
+        port_uuids = [self._add_port(idx) for idx in range(ports)]
+        for idx in range(switches):
+            self.add_row(constants.LOGICAL_SWITCH, self.new_uuid(), {
+                'name': 'neutron-%d' % idx,
+                'other_config': ['map', []],
+                'external_ids': snapshot.encode(
+                    {'neutron:network_name': 'network-%d' % idx}),
+                'ports': ['set', [['uuid', str(port_uuid)] for port_uuid in
+                                  port_uuids[idx::switches]]]})
+        for idx, port_uuid in enumerate(port_uuids[:qos]):
+            self.add_qos(self.get_row(port_uuid).name, idx)
+        for idx in range(port_groups):
+            acl_uuids = [self._add_acl(idx, priority)
+                         for priority in range(acls)]
+            self.add_row(constants.PORT_GROUP, self.new_uuid(), {
+                'name': 'pg_%d' % idx,
+                'external_ids': snapshot.encode(
+                    {'neutron:security_group_id': 'sg-%d' % idx}),
+                'acls': ['set', [['uuid', str(acl_uuid)] for acl_uuid in
+                                 acl_uuids]],
+                'ports': ['set', [['uuid', str(port_uuid)] for port_uuid in
+                                  port_uuids[idx::port_groups]]]})
+
+    def new_uuid(self):
+        return uuidlib.UUID(int=self._random.getrandbits(128), version=4)
+
+    def _add_port(self, idx):
+        # Like in Neutron, the port name (the Neutron port ID) is not the row
+        # UUID.
+        port_uuid = self.new_uuid()
+        port_name = str(self.new_uuid())
+        self.add_row(constants.LOGICAL_SWITCH_PORT, port_uuid, {
+            'name': port_name,
+            'external_ids': snapshot.encode({
+                'neutron:port_name': 'port-%d' % idx,
+                'neutron:device_id': port_name,
+                'neutron:cidrs': '10.%d.%d.%d/16' % (
+                    idx >> 16 & 255, idx >> 8 & 255, idx & 255)}),
+            'addresses': ['set', ['fa:16:3e:%02x:%02x:%02x' % (
+                idx >> 16 & 255, idx >> 8 & 255, idx & 255)]],
+            'ha_chassis_group': ['set', []],
+            'type': '', 'options': ['map', []]})
+        return port_uuid
+
+    def add_port(self, switch, idx):
+        """Add a new port to a switch and return it"""
+        port_uuid = self._add_port(idx)
+        self.row_columns(switch.uuid)['ports'][1].append(
+            ['uuid', str(port_uuid)])
+        return self.get_row(port_uuid)
+
+    def add_qos(self, port_name, idx):
+        qos_uuid = self.new_uuid()
+        direction = ('from-lport', 'to-lport')[idx % 2]
+        self.add_row(constants.QOS, qos_uuid, {
+            'action': ['map', []],
+            'match': '%s == "%s"' % (('inport', 'outport')[idx % 2],
+                                     port_name),
+            'bandwidth': snapshot.encode({'rate': 1000, 'burst': 800}),
+            'priority': 2002, 'direction': direction,
+            'external_ids': ['map', []]})
+        return self.get_row(qos_uuid)
+
+    def _add_acl(self, idx, priority):
+        acl_uuid = self.new_uuid()
+        self.add_row(constants.ACL, acl_uuid, {
+            'name': ['set', []], 'priority': 1000 + priority,
+            'direction': 'to-lport', 'external_ids': ['map', []],
+            'meter': ['set', []],
+            'match': 'outport == @pg_%d && ip4 && tcp.dst == %d' % (
+                idx, 1 + priority),
+            'action': 'allow-related', 'severity': ['set', []]})
+        return acl_uuid
+
+    def rows(self, table_name):
+        return list(self.tables[table_name].rows.values())
+
+
+class Benchmark(object):
+    """Run the tree phases over a FakeNorthbound; time and peak memory"""
+
+    def __init__(self, args, trace_memory=True):
+        self._args = args
+        self._trace_memory = trace_memory
+        self._nb = None
+        self._root_tree = None
+        self.results = []
+
+    def _run_phase(self, name, method, *args):
+        if self._trace_memory:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        count = method(*args)
+        result = {'phase': name, 'seconds': time.perf_counter() - start,
+                  'count': count}
+        if self._trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            result['peak_mb'] = (peak - start_memory) / 2 ** 20
+            result['retained_mb'] = (current - start_memory) / 2 ** 20
+        self.results.append(result)
+        return result
+
+    def run(self):
+        if self._trace_memory:
+            tracemalloc.start()
+        try:
+            yield self._run_phase('generate', self.generate)
+            yield self._run_phase('populate', self.populate)
+            yield self._run_phase('populate-lazy', self.populate_lazy)
+            yield self._run_phase('qos-lookup', self.qos_lookup)
+            yield self._run_phase('search', self.search)
+            yield self._run_phase('where-used', self.where_used)
+            yield self._run_phase('find-rules', self.find_rules)
+            events = self.make_events()
+            yield self._run_phase('notifications', self.notifications,
+                                  events)
+            yield self._run_phase('reconcile', self.reconcile)
+            yield self._run_phase('delete', self.delete)
+        finally:
+            if self._trace_memory:
+                tracemalloc.stop()
+
+    def _new_root_tree(self, lazy):
+        root_tree = treetypes.RootTree(headless.HeadlessTreeview(), lazy=lazy)
+        root_tree.update_ovn_connections(self._nb, None)
+        return root_tree
+
+    def generate(self):
+        args = self._args
+        self._nb = FakeNorthbound(args.switches, args.ports, args.qos,
+                                  args.port_groups, args.acls, seed=args.seed)
+        return sum(len(table.rows) for table in self._nb.tables.values())
+
+    def populate(self):
+        """Build the whole tree, like the non lazy mode"""
+        self._root_tree = self._new_root_tree(lazy=False)
+        self._root_tree.populate_subtree()
+        return len(self._root_tree.treeview)
+
+    def populate_lazy(self):
+        """Build the first level of the tree, like at the start up"""
+        root_tree = self._new_root_tree(lazy=True)
+        root_tree.populate_subtree()
+        for leaf in root_tree.treeview.get_children():
+            root_tree.expand_leaf(leaf)
+        return len(root_tree.treeview)
+
+    def qos_lookup(self):
+        """Find the QoS rules of every port, building the index"""
+        root_tree = self._new_root_tree(lazy=True)
+        count = 0
+        for port in self._nb.rows(constants.LOGICAL_SWITCH_PORT):
+            qos_tt = treetypes.QoSes(root_tree, self._nb, None,
+                                     parent_uuid=str(port.uuid))
+            count += sum(1 for _ in qos_tt.extid_qos_map(port.name))
+        return count
+
+    def search(self):
+        """Build the search index and search a port by name"""
+        return len(self._root_tree.search('port-1'))
+
+    def where_used(self):
+        """Find the rows referring to every port and port group"""
+        count = 0
+        for table_name in (constants.LOGICAL_SWITCH_PORT,
+                           constants.PORT_GROUP):
+            for uuid in self._nb.tables[table_name].rows:
+                count += len(self._root_tree.where_used(table_name,
+                                                        str(uuid)))
+        return count
+
+    def find_rules(self):
+        """Build the "match" index and find the rules of a TCP port"""
+        return len(self._root_tree.find_rules('tcp/1'))
+
+    def make_events(self):
+        """Modify the database and return the IDL events of the changes
+
+        Rename switches, add ports to the switches and move QoS rules to
+        other ports, in equal parts.
+        """
+        queue = notifications.NotificationQueue()
+        switches = self._nb.rows(constants.LOGICAL_SWITCH)
+        ports = self._nb.rows(constants.LOGICAL_SWITCH_PORT)
+        qos_rules = self._nb.rows(constants.QOS)
+        for idx in range(self._args.events):
+            switch = switches[idx % len(switches)]
+            if idx % 3 == 0:
+                self._nb.row_columns(switch.uuid)['external_ids'] = (
+                    snapshot.encode({'neutron:network_name': 'new-%d' % idx}))
+            elif idx % 3 == 1 or not qos_rules:
+                port = self._nb.add_port(switch, len(ports) + idx)
+                queue.push(notifications.ROW_CREATE, port)
+            else:
+                qos = qos_rules[idx % len(qos_rules)]
+                port = ports[(idx * 7919) % len(ports)]
+                self._nb.row_columns(qos.uuid)['match'] = (
+                    'inport == "%s"' % port.name)
+                queue.push(notifications.ROW_UPDATE, qos)
+                continue
+            queue.push(notifications.ROW_UPDATE, switch)
+        return queue
+
+    def notifications(self, queue):
+        """Apply the events like the viewer does, in batches"""
+        count = 0
+        while True:
+            events = queue.drain(limit=constants.NOTIFICATION_BATCH_SIZE)
+            if not events:
+                return count
+            self._root_tree.process_events(events)
+            count += len(events)
+
+    def reconcile(self):
+        """Update the whole tree to the database, like a forced refresh"""
+        self._root_tree.reconcile(self._nb, None)
+        return len(self._root_tree.treeview)
+
+    def delete(self):
+        """Delete a tenth of the ports one by one, then all the switches"""
+        ports = self._nb.rows(constants.LOGICAL_SWITCH_PORT)
+        for port in ports[::10]:
+            self._root_tree.delete_leaf(port)
+        self._root_tree.delete_leaves(
+            self._nb.rows(constants.LOGICAL_SWITCH))
+        return len(ports[::10])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='OVN tree viewer benchmarks, over a synthetic NB '
+                    'database; neither a display nor an OVSDB server is '
+                    'needed')
+    parser.add_argument('--switches', type=int, default=1000)
+    parser.add_argument('--ports', type=int, default=100000)
+    parser.add_argument('--qos', type=int, default=10000)
+    parser.add_argument('--port-groups', type=int, default=5000)
+    parser.add_argument('--acls', type=int, default=50,
+                        help='ACLs per port group')
+    parser.add_argument('--events', type=int, default=10000,
+                        help='IDL events of the notifications phase')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Do not trace the memory, that slows down '
+                             'the phases')
+    parser.add_argument('--json', action='store_true',
+                        help='Print a JSON line per phase')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    benchmark = Benchmark(args, trace_memory=not args.no_memory)
+    if not args.json:
+        print('%-16s %10s %10s %10s %12s' % ('phase', 'count', 'seconds',
+                                             'peak MB', 'retained MB'))
+    for result in benchmark.run():
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print('%-16s %10d %10.3f %10s %12s' % (
+                result['phase'], result['count'], result['seconds'],
+                '%.1f' % result['peak_mb'] if 'peak_mb' in result else '-',
+                '%.1f' % result['retained_mb'] if 'retained_mb' in result
+                else '-'))
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# Copyright (c) 2020 Fistro Co.
+
+from ovn_viewer import connection
+from ovn_viewer import dbfile
+from ovn_viewer import snapshot
+
+
+# Source reading the NB database from the OVN connection.
+LIVE = 'live'
+
+
+def load(source=LIVE, schema_path=None):
+    """Load a snapshot, a NB database file or, with LIVE, the NB database
+
+    A database file can be a standalone or clustered one or an
+    "ovsdb-client dump --format=json" output, that needs the schema.
+    """
+    if source == LIVE:
+        return connection.get_ovn_nb()
+    if snapshot.is_snapshot(source):
+        return snapshot.Snapshot.load(source)
+    return dbfile.load(source, schema_path=schema_path)
+
+
+def add_schema_argument(parser):
+    parser.add_argument(
+        '--schema', metavar='PATH',
+        help='NB database schema, needed to read a JSON dump')
+
+
+def add_source_arguments(parser):
+    """Add the options of the NB database read, see "load_source\""""
+    parser.add_argument(
+        '--snapshot', metavar='PATH', help='Read a saved snapshot')
+    parser.add_argument(
+        '--db-file', metavar='PATH',
+        help='Read a NB database file (standalone or clustered) or an '
+             '"ovsdb-client dump --format=json" output')
+    add_schema_argument(parser)
+
+
+def load_source(args):
+    """Load the NB database of the "add_source_arguments" options
+
+    By default, the NB database is read from the OVN connection.
+    """
+    return load(args.snapshot or args.db_file or LIVE,
+                schema_path=args.schema)
+
+
+def write_output(writer, *args, **kwargs):
+    """Call a writer of the standard output; stop if the pipe is closed"""
+    try:
+        writer(*args, **kwargs)
+    except BrokenPipeError:
+        pass  # E.g.: piped to "head".
@@ -1,39 +1,310 @@
 # Copyright (c) 2020 Fistro Co.
 
+from concurrent import futures
+import queue
+import threading
+
+from ovs.db import idl as ovs_idl
 from ovsdbapp.backend.ovs_idl import idlutils
 from ovsdbapp.backend.ovs_idl import connection
-from ovsdbapp import event as ovs_event
 from ovsdbapp.schema.ovn_northbound import impl_idl as nb_impl_idl
+from ovsdbapp.schema.ovn_southbound import impl_idl as sb_impl_idl
 
 from ovn_viewer import constants
+from ovn_viewer import instrumentation
+from ovn_viewer import treetypes
+
+
+# Tables of the monitor scope: parent table --> (column, child table). The
+# child rows monitored are the ones referenced by the parent rows in scope.
+SCOPE_TABLES = {
+    constants.LOGICAL_SWITCH: ('ports', constants.LOGICAL_SWITCH_PORT),
+    constants.PORT_GROUP: ('acls', constants.ACL),
+}
+
+
+class Cluster(object):
+    """OVN deployment: a name and its NB and SB connection strings
+
+    A connection string can have several remotes, comma separated (e.g.: the
+    members of a RAFT cluster); the IDL connects to one of them and fails
+    over to the next one when the connection is lost.
+    """
+
+    def __init__(self, name=constants.DEFAULT_CLUSTER,
+                 nb_connection=constants.OVN_NB_CONNECTION,
+                 sb_connection=constants.OVN_SB_CONNECTION):
+        self.name = name
+        self.nb_connection = nb_connection
+        self.sb_connection = sb_connection
+
+    def get_connection(self, schema_name):
+        if schema_name == constants.OVN_SOUTHBOUND:
+            return self.sb_connection
+        return self.nb_connection
+
+
+class MonitorScope(object):
+    """Northbound rows monitored, using OVSDB conditional monitoring
+
+    The rows in scope are the Logical_Switch and Port_Group rows matching
+    any of the UUIDs or matching the "external_ids" filter (all the key/value
+    pairs), and their child rows. An empty scope monitors all the rows.
+    """
+
+    def __init__(self, uuids=None, external_ids=None):
+        self.uuids = sorted(set(str(uuid) for uuid in uuids or ()))
+        self.external_ids = dict(external_ids or {})
+
+    @classmethod
+    def from_filters(cls, uuids=None, filters=None):
+        """Build the scope from "key=value" external_ids filters"""
+        external_ids = {}
+        for _filter in filters or ():
+            key, sep, value = _filter.partition('=')
+            if not sep:
+                raise ValueError('Scope filter %s must be "key=value"' %
+                                 _filter)
+            external_ids[key] = value
+        return cls(uuids=uuids, external_ids=external_ids)
+
+    def __bool__(self):
+        return bool(self.uuids or self.external_ids)
+
+    def conditions(self):
+        """Return the conditions of the parent tables (any clause matches)"""
+        if not self:
+            return [True]
+        clauses = [['_uuid', '==', ['uuid', uuid]] for uuid in self.uuids]
+        if self.external_ids:
+            clauses.append(['external_ids', 'includes',
+                            ['map', [[key, value] for key, value in
+                                     sorted(self.external_ids.items())]]])
+        return clauses
+
+
+class _ScopeChange(object):
+    """Pseudo-transaction executed by the IDL connection thread
+
+    "Connection.queue_txn" wakes up the connection thread, that calls
+    "do_commit"; the IDL conditions are changed from the thread that owns the
+    IDL, without reconnecting.
+    """
+
+    def __init__(self, idl, scope):
+        self.results = queue.Queue(1)
+        self._idl = idl
+        self._scope = scope
+
+    def do_commit(self):
+        self._idl.set_scope(self._scope)
 
 
 class OvnIdl(connection.OvsdbIdl):
 
-    def __init__(self, connection_string, schema_name, notification_backend):
-        helper = idlutils.get_schema_helper(connection_string, schema_name)
-        helper.register_all()
+    def __init__(self, connection_string, schema_name, helper, tables,
+                 notification_backend, scope=None):
+        for table, columns in tables.items():
+            helper.register_columns(table, sorted(columns))
         self._notification_backend = notification_backend
         super(OvnIdl, self).__init__(connection_string, helper)
+        self._scope = MonitorScope()
+        self._scope_children = {}  # Child table --> UUIDs in the condition.
+        self._scope_changed = False
+        if scope and schema_name == constants.OVN_NORTHBOUND:
+            self.set_scope(scope)
 
+    @instrumentation.timed
     def notify(self, event, row, updates=None):
-        if row._table.name not in constants.NOTIFY_ELEMENT_TYPES:
+        if row._table.name in SCOPE_TABLES and self._scope:
+            self._scope_changed = True
+        if (self._notification_backend is None or
+                treetypes.get_tree_type(row._table.name) is None):
+            return
+        self._notification_backend.push(event, row)
+
+    def run(self):
+        super(OvnIdl, self).run()
+        if self._scope_changed and self._update_child_conditions():
+            super(OvnIdl, self).run()  # Send the new conditions now.
+
+    def set_scope(self, scope):
+        """Set the rows monitored; must be called from the IDL thread"""
+        self._scope = scope
+        for table in SCOPE_TABLES:
+            self.cond_change(table, scope.conditions())
+        self._scope_children = {}
+        self._update_child_conditions()
+
+    def _update_child_conditions(self):
+        """Monitor the child rows of the parent rows in scope
+
+        Returns True if any condition changed.
+        """
+        self._scope_changed = False
+        changed = False
+        for table, (column, child_table) in SCOPE_TABLES.items():
+            if not self._scope:
+                uuids = None
+                conditions = [True]
+            else:
+                uuids = set()
+                for row in self.tables[table].rows.values():
+                    uuids.update(atom.value for atom in
+                                 row._data[column].values)
+                conditions = [['_uuid', '==', ['uuid', str(uuid)]]
+                              for uuid in sorted(uuids)] or [False]
+            if (child_table not in self._scope_children or
+                    self._scope_children[child_table] != uuids):
+                self._scope_children[child_table] = uuids
+                self.cond_change(child_table, conditions)
+                changed = True
+        return changed
+
+
+def fetch_schema_helper(connection_string, schema_name):
+    """Return the schema helper of the first remote answering"""
+    error = None
+    for remote in connection_string.split(','):
+        try:
+            return idlutils.get_schema_helper(remote, schema_name)
+        except Exception as exc:
+            error = exc
+    raise error
+
+
+def _get_ovn_api(connection_string, schema_name, notifications, scope=None,
+                 helper=None):
+    tables = treetypes.get_registered_tables(schema_name)
+    if not tables:
+        return  # Nothing is displayed from this database.
+    if helper is None:
+        with instrumentation.timer('%s schema' % schema_name):
+            helper = fetch_schema_helper(connection_string, schema_name)
+    _idl = OvnIdl(connection_string, schema_name, helper, tables,
+                  notifications, scope=scope)
+    _conn = connection.Connection(
+        _idl, timeout=constants.OVSDB_CONNECTION_TIMEOUT)
+    api_class = (sb_impl_idl.OvnSbApiIdlImpl if
+                 schema_name == constants.OVN_SOUTHBOUND else
+                 nb_impl_idl.OvnNbApiIdlImpl)
+    # The ovsdbapp API classes keep the connection in a class attribute, set
+    # by the first instance only: an API subclass per connection, otherwise
+    # all the clusters would use the first cluster connection.
+    api_class = type(api_class.__name__, (api_class, ),
+                     {'_ovsdb_connection': None})
+    with instrumentation.timer('%s initial sync' % schema_name):
+        _conn.start()
+        return api_class(_conn, start=False)
+
+
+def get_ovn_nb(notifications=None, scope=None, cluster=None):
+    """Connect to the NB database; blocks until the initial sync is done"""
+    cluster = cluster or Cluster()
+    return _get_ovn_api(cluster.nb_connection, constants.OVN_NORTHBOUND,
+                        notifications, scope=scope)
+
+
+def close_ovn_api(ovn_api):
+    """Stop the connection thread of a database API"""
+    if ovn_api:
+        ovn_api.ovsdb_connection.stop()
+
+
+class ConnectionPool(object):
+    """Connections to the NB and SB databases of several clusters
+
+    The schema fetch and the initial sync of each database are executed in
+    the pool worker threads, all the clusters in parallel: a slow cluster
+    does not delay the other ones. The schema of each database is fetched
+    once and reused when the cluster is connected again; it is not shared
+    between clusters, that could run different OVN versions.
+
+    The workers are daemon threads, unlike the ThreadPoolExecutor ones that
+    are joined when the interpreter exits: quitting while a cluster is still
+    connecting does not wait for its schema fetch or sync timeout.
+    """
+
+    def __init__(self, max_workers=constants.CONNECTION_POOL_WORKERS):
+        self._max_workers = max_workers
+        self._workers = []
+        self._tasks = queue.Queue()  # (future, function, args, kwargs)
+        self._shutdown = False
+        self._schemas = {}  # (connection string, schema) --> schema JSON.
+
+    def _work(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            future, function, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args, **kwargs))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+    def _submit(self, function, *args, **kwargs):
+        if self._shutdown:
+            raise RuntimeError('The connection pool is shut down')
+        future = futures.Future()
+        self._tasks.put((future, function, args, kwargs))
+        if len(self._workers) < self._max_workers:
+            worker = threading.Thread(target=self._work, daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        return future
+
+    def get_schema_helper(self, connection_string, schema_name):
+        schema_json = self._schemas.get((connection_string, schema_name))
+        if schema_json is not None:
+            return ovs_idl.SchemaHelper(schema_json=schema_json)
+        with instrumentation.timer('%s schema' % schema_name):
+            helper = fetch_schema_helper(connection_string, schema_name)
+        self._schemas[(connection_string, schema_name)] = helper.schema_json
+        return helper
+
+    def _get_ovn_api(self, connection_string, schema_name, notifications,
+                     scope=None):
+        if not treetypes.get_registered_tables(schema_name):
             return
-        if event == ovs_event.RowEvent.ROW_CREATE:
-            pass  # TODO(ralonsoh): to implement
-        if event == ovs_event.RowEvent.ROW_UPDATE:
-            pass  # TODO(ralonsoh): to implement
-        if event == ovs_event.RowEvent.ROW_DELETE:
-            self._notification_backend.delete_leaf(row)
-
-
-def get_ovn_conn(viewer):
-    _nb_idl = OvnIdl(constants.OVN_NB_CONNECTION, 'OVN_Northbound', viewer)
-    _nb_conn = connection.Connection(
-        _nb_idl, timeout=constants.OVSDB_CONNECTION_TIMEOUT)
-    ovn_nb = nb_impl_idl.OvnNbApiIdlImpl(_nb_conn, start=True)
-    _sb_idl = OvnIdl(constants.OVN_SB_CONNECTION, 'OVN_Southbound', viewer)
-    _sb_conn = connection.Connection(
-        _sb_idl, timeout=constants.OVSDB_CONNECTION_TIMEOUT)
-    ovn_sb = nb_impl_idl.OvnNbApiIdlImpl(_sb_conn, start=True)
-    return ovn_nb, ovn_sb
+        return _get_ovn_api(
+            connection_string, schema_name, notifications, scope=scope,
+            helper=self.get_schema_helper(connection_string, schema_name))
+
+    def connect(self, cluster, notifications, scope=None):
+        """Connect to the NB and SB databases of a cluster
+
+        Returns the NB and SB futures; the result of each one is the database
+        API (None if no tree type uses the database).
+        """
+        nb_future = self._submit(
+            self._get_ovn_api, cluster.nb_connection,
+            constants.OVN_NORTHBOUND, notifications, scope=scope)
+        sb_future = self._submit(
+            self._get_ovn_api, cluster.sb_connection,
+            constants.OVN_SOUTHBOUND, notifications)
+        return nb_future, sb_future
+
+    def shutdown(self):
+        """Stop accepting connections; the pending ones are not waited
+
+        The connections not started are cancelled; the workers still
+        connecting do not block the interpreter exit.
+        """
+        self._shutdown = True
+        while True:
+            try:
+                task = self._tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task:
+                task[0].cancel()
+        for _ in self._workers:
+            self._tasks.put(None)
+
+
+def set_monitor_scope(ovn_api, scope):
+    """Change the rows monitored in place, without reconnecting"""
+    ovn_api.ovsdb_connection.queue_txn(_ScopeChange(ovn_api.idl, scope))
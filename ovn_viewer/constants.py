@@ -1,9 +1,54 @@
 # Copyright (c) 2020 Fistro Co.
 
+import os
+
 # OVN parameters
 OVN_NB_CONNECTION = 'tcp:127.0.0.1:6641'
 OVN_SB_CONNECTION = 'tcp:127.0.0.1:6642'
 OVSDB_CONNECTION_TIMEOUT = 30
+CONNECTION_POLL_INTERVAL = 100  # milliseconds
+# Cluster of the connections above, used when no cluster is given.
+DEFAULT_CLUSTER = 'local'
+# Databases synchronized in parallel (two per cluster, NB and SB).
+CONNECTION_POOL_WORKERS = 16
+
+# NB snapshot saved on exit and shown at startup while connecting; the other
+# clusters than the default one use "nb_snapshot-<cluster>.jsonl".
+SNAPSHOT_CACHE = os.path.join(os.path.expanduser('~'), '.cache',
+                              'ovn_viewer', 'nb_snapshot.jsonl')
+
+# IDL notifications, applied by the Tk main loop in batches.
+NOTIFICATION_INTERVAL = 200  # milliseconds, see "--refresh-interval".
+NOTIFICATION_BATCH_SIZE = 5000
+
+# Instrumentation stats, written periodically with "--diagnostics-log".
+DIAGNOSTICS_LOG_INTERVAL = 10000  # milliseconds
+
+# Treeview parameters
+# Build only the top level leafs at startup; each leaf children are built from
+# the IDL data when the leaf is opened for the first time.
+TREE_LAZY_POPULATION = True
+TREE_PLACEHOLDER_TEXT = '...'
+# The child leafs of a type leaf are inserted a page at a time; the next page
+# and the remaining leafs are inserted when the pager leafs are opened.
+TREE_PAGE_SIZE = 500
+TREE_NEXT_PAGE_TEXT = '(next %d of %d more)'
+TREE_SHOW_ALL_TEXT = '(all the %d more)'
+
+# Search box: the matches are counted while typing, from this length, and
+# shown in the tree (up to this number) when "Return" is pressed.
+SEARCH_MIN_LENGTH = 3
+SEARCH_MAX_RESULTS = 100
+# The search index is built in the background, these rows per idle callback.
+SEARCH_INDEX_CHUNK_SIZE = 1000
+
+# ACL and QoS "match" expressions parsed and kept, see "match.parse".
+MATCH_CACHE_SIZE = 65536
+
+# Snapshot comparison window: background of the added, removed and changed
+# rows; and the rows shown per table, the rest are only counted.
+DIFF_COLORS = {'added': '#d7f5d7', 'removed': '#f5d7d7', 'changed': '#f5efc8'}
+DIFF_MAX_ROWS = 5000
 
 # Monospace fonts
 MONOSPACE_FONTS = ('Andale Mono WT', 'Andale Mono', 'Lucida Console',
@@ -11,14 +56,21 @@ MONOSPACE_FONTS = ('Andale Mono WT', 'Andale Mono', 'Lucida Console',
                    'Bitstream Vera Sans Mono', 'Liberation Mono',
                    'Nimbus Mono L', 'Monaco', 'Courier New')
 
+# OVN databases
+OVN_NORTHBOUND = 'OVN_Northbound'
+OVN_SOUTHBOUND = 'OVN_Southbound'
+
 # OVN element types
+HA_CHASSIS_GROUP = 'HA_Chassis_Group'
 LOGICAL_SWITCH = 'Logical_Switch'
 LOGICAL_SWITCH_PORT = 'Logical_Switch_Port'
 PORT_GROUP = 'Port_Group'
 QOS = 'QoS'
 ACL = 'ACL'
+LOGICAL_ROUTER = 'Logical_Router'
+LOGICAL_ROUTER_PORT = 'Logical_Router_Port'
+ADDRESS_SET = 'Address_Set'
+CHASSIS = 'Chassis'
+PORT_BINDING = 'Port_Binding'
 #DHCP_OPTIONS = 'DHCP_Options'
 #GATEWAY_CHASSIS = 'Gateway_Chassis'
-
-NOTIFY_ELEMENT_TYPES = (LOGICAL_SWITCH, LOGICAL_SWITCH_PORT, PORT_GROUP,
-                        QOS, ACL)
@@ -0,0 +1,323 @@
+# Copyright (c) 2020 Fistro Co.
+
+import json
+import uuid as uuidlib
+
+from ovn_viewer import constants
+from ovn_viewer import snapshot
+from ovn_viewer import treetypes
+
+
+CHUNK_SIZE = 1024 * 1024
+STANDALONE_MAGIC = 'OVSDB JSON'
+CLUSTERED_MAGIC = 'OVSDB CLUSTER'
+
+SCALAR = 'scalar'
+SET = 'set'
+MAP = 'map'
+_DEFAULT_ATOMS = {'integer': 0, 'real': 0.0, 'boolean': False, 'string': '',
+                  'uuid': ['uuid', str(uuidlib.UUID(int=0))]}
+
+
+class JsonStream(object):
+    """Incremental JSON reader of a text file
+
+    Objects and arrays can be walked member by member ("members", "items")
+    and only the values read with "read_value" are decoded. A huge JSON
+    document, like the snapshot record of a compacted database, is parsed
+    keeping a single row in memory.
+    """
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._buffer = ''
+        self._pos = 0
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self):
+        data = self._stream.read(self._chunk_size)
+        if not data:
+            return False
+        self._buffer = self._buffer[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non blank character, or '' at the end"""
+        while True:
+            while (self._pos < len(self._buffer) and
+                   self._buffer[self._pos] in ' \t\r\n'):
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError('Expected one of %r, found %r' % (chars, char))
+        self._pos += 1
+        return char
+
+    def read_line(self):
+        self.peek()
+        end = self._buffer.find('\n', self._pos)
+        while end < 0:
+            # Search the new data only; "_fill" drops the data already read.
+            start = len(self._buffer) - self._pos
+            if not self._fill():
+                end = len(self._buffer)
+                break
+            end = self._buffer.find('\n', start)
+        line = self._buffer[self._pos:end]
+        self._pos = end + 1
+        return line
+
+    def read_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer could continue in the file.
+            if end < len(self._buffer) or not self._fill():
+                self._pos = end
+                return value
+
+    def members(self):
+        """Walk an object; the caller must read the value of each key"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.expect('}')
+            return
+        while True:
+            key = self.read_value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def items(self):
+        """Walk an array; the caller must read each element"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.expect(']')
+            return
+        while True:
+            yield
+            if self.expect(',]') == ']':
+                return
+
+
+def _atom_key(atom):
+    return tuple(atom) if isinstance(atom, list) else atom
+
+
+class _Loader(object):
+    """Build a Snapshot with the tables and columns the tree types use"""
+
+    def __init__(self, schema_name):
+        self.snapshot = snapshot.Snapshot(schema_name=schema_name)
+        self.tables = treetypes.get_registered_tables(schema_name)
+        self.columns = {}  # Table --> {column: (kind, default value)}
+
+    def set_schema(self, schema):
+        for table_name, table in schema['tables'].items():
+            if table_name not in self.tables:
+                continue
+            self.columns[table_name] = {
+                column: self._column_type(table['columns'][column]['type'])
+                for column in self.tables[table_name]
+                if column in table['columns']}
+
+    @staticmethod
+    def _column_type(type_json):
+        if not isinstance(type_json, dict):
+            return SCALAR, _DEFAULT_ATOMS.get(type_json)
+        if 'value' in type_json:
+            return MAP, ['map', []]
+        if type_json.get('min', 1) != 1 or type_json.get('max', 1) != 1:
+            return SET, ['set', []]
+        key = type_json['key']
+        return SCALAR, _DEFAULT_ATOMS.get(
+            key['type'] if isinstance(key, dict) else key)
+
+    def _convert(self, kind, value):
+        if kind == SET and not (isinstance(value, list) and
+                                value[0] == SET):
+            return ['set', [value]]
+        return value
+
+    def insert(self, table_name, uuid, row_json):
+        columns = {}
+        for column, (kind, default) in self.columns[table_name].items():
+            if column in row_json:
+                columns[column] = self._convert(kind, row_json[column])
+            else:
+                columns[column] = default
+        self.snapshot.add_row(table_name, uuid, columns)
+
+    def modify(self, table_name, uuid, row_json, is_diff):
+        row_columns = self.snapshot.row_columns(uuid)
+        for column, (kind, _) in self.columns[table_name].items():
+            if column not in row_json:
+                continue
+            value = self._convert(kind, row_json[column])
+            if is_diff and kind == SET:
+                # The diff is the symmetric difference.
+                current = {_atom_key(atom): atom for atom in
+                           row_columns[column][1]}
+                for atom in value[1]:
+                    if current.pop(_atom_key(atom), None) is None:
+                        current[_atom_key(atom)] = atom
+                value = ['set', list(current.values())]
+            elif is_diff and kind == MAP:
+                # A pair with the same value is removed, else added/updated.
+                current = {_atom_key(key): [key, item] for key, item in
+                           row_columns[column][1]}
+                for key, item in value[1]:
+                    if current.get(_atom_key(key), [None, None])[1] == item:
+                        del current[_atom_key(key)]
+                    else:
+                        current[_atom_key(key)] = [key, item]
+                value = ['map', list(current.values())]
+            row_columns[column] = value
+
+    def apply_txn(self, stream):
+        """Apply a transaction record, reading one row at a time"""
+        if stream.peek() == 'n':
+            return stream.read_value()  # null, e.g. an empty cluster.
+
+        metadata = {}
+        modified = []
+        for table_name in stream.members():
+            if table_name.startswith('_'):  # "_date", "_is_diff"...
+                metadata[table_name] = stream.read_value()
+                continue
+            for row_uuid in stream.members():
+                row_json = stream.read_value()
+                if table_name not in self.columns:
+                    continue
+                uuid = uuidlib.UUID(row_uuid)
+                if row_json is None:
+                    self.snapshot.delete_row(uuid)
+                elif self.snapshot.get_row(uuid) is None:
+                    self.insert(table_name, uuid, row_json)
+                else:
+                    # "_is_diff" could be written after the tables.
+                    modified.append((table_name, uuid, row_json))
+
+        is_diff = metadata.get('_is_diff', False)
+        for table_name, uuid, row_json in modified:
+            self.modify(table_name, uuid, row_json, is_diff)
+
+
+def _load_standalone(stream, loader):
+    stream.read_line()
+    loader.set_schema(stream.read_value())
+    while stream.peek():
+        stream.read_line()
+        loader.apply_txn(stream)
+
+
+def _load_raft_data(stream, loader):
+    """Read a Raft [schema or null, transaction] data array"""
+    if stream.peek() == 'n':
+        return stream.read_value()
+    stream.expect('[')
+    schema = stream.read_value()
+    if schema:
+        loader.set_schema(schema)
+    stream.expect(',')
+    loader.apply_txn(stream)
+    stream.expect(']')
+
+
+def _load_clustered(stream, loader):
+    while stream.peek():
+        stream.read_line()
+        for key in stream.members():
+            if key in ('prev_data', 'data'):
+                _load_raft_data(stream, loader)
+            else:
+                stream.read_value()
+
+
+def _load_dump(stream, loader, tables=None):
+    """Read "ovsdb-client dump --format=json" output, one row at a time
+
+    The rows are inserted as read if the caption and the headings of the
+    table are written before them. "ovsdb-client" writes the headings after
+    the rows: the first pass returns the tables not inserted, {position in
+    the output: (table, headings)}, inserted in a second pass ("tables").
+    The rows are not buffered, a huge table is read in bounded memory.
+    """
+    missing = {}
+    position = 0
+    while stream.peek():
+        if stream.peek() in '[,]':
+            stream.expect('[,]')  # The tables could be in an array.
+            continue
+        table_name, headings = (None, None) if tables is None else (
+            tables.get(position, (None, None)))
+        inserted = False
+        for key in stream.members():
+            if key == 'caption' and tables is None:
+                table_name = stream.read_value().rsplit(' table', 1)[0]
+            elif key == 'headings' and tables is None:
+                headings = stream.read_value()
+            elif key == 'data':
+                inserted = table_name in loader.tables and bool(headings)
+                for _ in stream.items():
+                    row = stream.read_value()
+                    if inserted:
+                        row = dict(zip(headings, row))
+                        loader.insert(table_name,
+                                      uuidlib.UUID(row['_uuid'][1]), row)
+            else:
+                stream.read_value()
+        if not inserted and table_name in loader.tables and headings:
+            missing[position] = (table_name, headings)
+        position += 1
+    return missing
+
+
+def load(path, schema_name=constants.OVN_NORTHBOUND, schema_path=None):
+    """Load an OVSDB database file or an "ovsdb-client dump" JSON output
+
+    Supports the standalone and clustered database formats; the file is
+    streamed and only the rows and columns the tree types use are kept in
+    memory. A JSON dump does not include the schema, that must be provided
+    with "schema_path" (e.g.: ovn-nb.ovsschema or "ovsdb-client get-schema"
+    output): a set with one element is dumped as the element itself.
+    """
+    loader = _Loader(schema_name)
+    if schema_path:
+        with open(schema_path) as schema_file:
+            loader.set_schema(json.load(schema_file))
+
+    with open(path) as db_file:
+        stream = JsonStream(db_file)
+        if stream.peek() == 'O':
+            magic = stream.read_line()
+            db_file.seek(0)
+            stream = JsonStream(db_file)
+            if magic.startswith(CLUSTERED_MAGIC):
+                _load_clustered(stream, loader)
+            elif magic.startswith(STANDALONE_MAGIC):
+                _load_standalone(stream, loader)
+            else:
+                raise ValueError('Unknown database format: %s' % magic)
+        elif not schema_path:
+            raise ValueError('The schema is needed to load a JSON dump')
+        else:
+            tables = _load_dump(stream, loader)
+            if tables:
+                db_file.seek(0)
+                _load_dump(JsonStream(db_file), loader, tables=tables)
+    return loader.snapshot
@@ -0,0 +1,215 @@
+# Copyright (c) 2020 Fistro Co.
+
+import argparse
+import json
+import sys
+import uuid as uuidlib
+
+from ovn_viewer import cli
+from ovn_viewer import constants
+from ovn_viewer import snapshot
+from ovn_viewer import treetypes
+
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+STATES = (ADDED, REMOVED, CHANGED)
+STATE_MARKS = {ADDED: '+', REMOVED: '-', CHANGED: '~'}
+
+FORMAT_TEXT = 'text'
+FORMAT_JSON = 'json'
+FORMATS = (FORMAT_TEXT, FORMAT_JSON)
+
+
+class RowDiff(object):
+    """Difference of a row between two database states
+
+    "old" and "new" are the column values ({column: value}) of the row in
+    each state: all the columns of an added (no "old") or removed (no "new")
+    row and the changed columns only of a changed row.
+    """
+
+    __slots__ = ('table', 'uuid', 'state', 'old', 'new')
+
+    def __init__(self, table, uuid, state, old=None, new=None):
+        self.table = table
+        self.uuid = uuid
+        self.state = state
+        self.old = old
+        self.new = new
+
+    def to_dict(self):
+        return {'table': self.table, 'uuid': str(self.uuid),
+                'state': self.state, 'old': self.old, 'new': self.new}
+
+
+def _normalize(value):
+    """Return an encoded value (see "snapshot.encode") as a hashable one
+
+    The sets and maps are compared regardless of the order of the items.
+    """
+    if not isinstance(value, list):
+        return value
+    tag, value = value
+    if tag == 'uuid':
+        return uuidlib.UUID(value)
+    if tag == 'set':
+        return tag, frozenset(_normalize(item) for item in value)
+    return tag, frozenset((_normalize(key), _normalize(item))
+                          for key, item in value)
+
+
+def _plain(value):
+    """Return a normalized value as a JSON friendly one"""
+    if isinstance(value, uuidlib.UUID):
+        return str(value)
+    if not isinstance(value, tuple):
+        return value
+    tag, items = value
+    if tag == 'set':
+        return sorted((_plain(item) for item in items), key=str)
+    return {str(_plain(key)): _plain(item) for key, item in
+            sorted(items, key=lambda pair: str(pair[0]))}
+
+
+def _row_values(ovn_api, row, columns):
+    """Return the normalized values of the columns of a row"""
+    if isinstance(ovn_api, snapshot.Snapshot):
+        # Already encoded; missing in an older snapshot version.
+        encoded = ovn_api.row_columns(row.uuid)
+        return tuple(_normalize(encoded.get(column)) for column in columns)
+    return tuple(_normalize(snapshot.encode(getattr(row, column)))
+                 for column in columns)
+
+
+def _table_rows(ovn_api, table_name):
+    """Return a copy of the rows of a table, an IDL one could be changing"""
+    table = ovn_api.tables.get(table_name)
+    return dict(table.rows) if table is not None else {}
+
+
+def diff_table(old_api, new_api, table_name, columns):
+    """Yield the RowDiffs of a table, by UUID order
+
+    The rows are matched by UUID with hash lookups and their column values
+    compared as tuples; the changed columns are looked for only in the rows
+    whose tuples differ.
+    """
+    old_rows = _table_rows(old_api, table_name)
+    new_rows = _table_rows(new_api, table_name)
+    for uuid in sorted(old_rows.keys() | new_rows.keys(), key=str):
+        old_row = old_rows.get(uuid)
+        new_row = new_rows.get(uuid)
+        if old_row is None:
+            yield RowDiff(table_name, uuid, ADDED, new=dict(zip(
+                columns, map(_plain, _row_values(new_api, new_row,
+                                                 columns)))))
+        elif new_row is None:
+            yield RowDiff(table_name, uuid, REMOVED, old=dict(zip(
+                columns, map(_plain, _row_values(old_api, old_row,
+                                                 columns)))))
+        else:
+            old_values = _row_values(old_api, old_row, columns)
+            new_values = _row_values(new_api, new_row, columns)
+            if old_values == new_values:
+                continue
+            changed = [idx for idx, value in enumerate(old_values)
+                       if value != new_values[idx]]
+            yield RowDiff(
+                table_name, uuid, CHANGED,
+                old={columns[idx]: _plain(old_values[idx])
+                     for idx in changed},
+                new={columns[idx]: _plain(new_values[idx])
+                     for idx in changed})
+
+
+def diff(old_api, new_api, schema_name=constants.OVN_NORTHBOUND):
+    """Yield the RowDiffs of two database states, table by table
+
+    The states can be any object with the IDL "tables" interface: an IDL,
+    a Snapshot or a loaded database file. Only the tables and columns the
+    tree types use are compared.
+    """
+    for table_name, columns in sorted(
+            treetypes.get_registered_tables(schema_name).items()):
+        yield from diff_table(old_api, new_api, table_name,
+                              sorted(columns))
+
+
+def format_value(value):
+    return json.dumps(value, sort_keys=True)
+
+
+def format_change(old, new):
+    """Return the text of a changed column value
+
+    Only the items added (+) and removed (-) of a set, or the keys changed
+    of a map, are written.
+    """
+    if isinstance(old, list) and isinstance(new, list):
+        old_items, new_items = set(old), set(new)
+        return '+%s -%s' % (
+            format_value([item for item in new if item not in old_items]),
+            format_value([item for item in old if item not in new_items]))
+    if isinstance(old, dict) and isinstance(new, dict):
+        keys = [key for key in old.keys() | new.keys()
+                if old.get(key) != new.get(key)]
+        old = {key: old[key] for key in keys if key in old}
+        new = {key: new[key] for key in keys if key in new}
+    return '%s --> %s' % (format_value(old), format_value(new))
+
+
+def _write_text(row_diffs, output):
+    table_name = None
+    for row_diff in row_diffs:
+        if row_diff.table != table_name:
+            table_name = row_diff.table
+            output.write(table_name + '\n')
+        output.write('  %s %s\n' % (STATE_MARKS[row_diff.state],
+                                    row_diff.uuid))
+        if row_diff.state != CHANGED:
+            continue
+        for column in sorted(row_diff.new):
+            output.write('      %s: %s\n' % (column, format_change(
+                row_diff.old[column], row_diff.new[column])))
+
+
+def _write_json(row_diffs, output):
+    for row_diff in row_diffs:
+        output.write(json.dumps(row_diff.to_dict(), sort_keys=True) + '\n')
+
+
+_WRITERS = {FORMAT_TEXT: _write_text,
+            FORMAT_JSON: _write_json}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Write the differences between two OVN NB database '
+                    'states to the standard output: the rows added (+), '
+                    'removed (-) and changed (~), per table')
+    for name in ('old', 'new'):
+        parser.add_argument(
+            name, help='A saved snapshot, a NB database file, an '
+                       '"ovsdb-client dump --format=json" output or "%s" '
+                       'to read the NB database from the OVN connection' %
+                       cli.LIVE)
+    cli.add_schema_argument(parser)
+    parser.add_argument(
+        '--format', choices=FORMATS, default=FORMAT_TEXT,
+        help='"text": the rows and the changed columns; "json": a JSON line '
+             'per row (default: %(default)s)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    old_api = cli.load(args.old, schema_path=args.schema)
+    new_api = cli.load(args.new, schema_path=args.schema)
+    cli.write_output(_WRITERS[args.format], diff(old_api, new_api),
+                     sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
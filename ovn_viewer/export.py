@@ -0,0 +1,96 @@
+# Copyright (c) 2020 Fistro Co.
+
+import argparse
+import csv
+import json
+import sys
+
+from ovn_viewer import cli
+from ovn_viewer import treetypes
+
+
+FORMAT_JSON = 'json'
+FORMAT_TREE = 'tree'
+FORMAT_CSV = 'csv'
+FORMATS = (FORMAT_JSON, FORMAT_TREE, FORMAT_CSV)
+CSV_HEADER = ('depth', 'type', 'uuid', 'parent', 'text', 'info')
+
+
+def _json_default(value):
+    """Encode the column values "json" does not know
+
+    The referenced rows are written as their UUID.
+    """
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(getattr(value, 'uuid', value))
+
+
+def _dumps(value):
+    return json.dumps(value, default=_json_default, sort_keys=True)
+
+
+def _write_json(elements, output):
+    for depth, tree_type, row, parent_uuid in elements:
+        output.write(_dumps({
+            'depth': depth, 'type': tree_type.TYPE, 'uuid': str(row.uuid),
+            'parent': parent_uuid, 'text': tree_type.leaf_text(row),
+            'info': tree_type.get_datum(row)}) + '\n')
+
+
+def _write_tree(elements, output):
+    """Write an indented tree, with the type headers like the Treeview"""
+    headers = {}  # Depth --> (parent UUID, type) of the last header.
+    for depth, tree_type, row, parent_uuid in elements:
+        if headers.get(depth) != (parent_uuid, tree_type.TYPE):
+            headers[depth] = (parent_uuid, tree_type.TYPE)
+            output.write('  ' * (2 * depth) + tree_type.TYPE + '\n')
+        output.write('  ' * (2 * depth + 1) + tree_type.leaf_text(row) + '\n')
+
+
+def _write_csv(elements, output):
+    writer = csv.writer(output)
+    writer.writerow(CSV_HEADER)
+    for depth, tree_type, row, parent_uuid in elements:
+        writer.writerow((depth, tree_type.TYPE, str(row.uuid),
+                         parent_uuid or '', tree_type.leaf_text(row),
+                         _dumps(tree_type.get_datum(row))))
+
+
+_WRITERS = {FORMAT_JSON: _write_json,
+            FORMAT_TREE: _write_tree,
+            FORMAT_CSV: _write_csv}
+
+
+def export(ovn_nb, output, output_format=FORMAT_JSON):
+    """Stream the tree elements to a file, as they are walked
+
+    Neither a Treeview nor the RootTree elements are built; see
+    "RootTree.walk".
+    """
+    root_tree = treetypes.RootTree(None)
+    root_tree.update_ovn_connections(ovn_nb, None)
+    _WRITERS[output_format](root_tree.walk(), output)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Write the OVN tree to the standard output, without a '
+                    'display; by default the NB database is read from '
+                    'the OVN connection')
+    parser.add_argument(
+        '--format', choices=FORMATS, default=FORMAT_TREE,
+        help='"json": a JSON line per element; "tree": indented text; '
+             '"csv": a CSV row per element (default: %(default)s)')
+    cli.add_source_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    ovn_nb = cli.load_source(args)
+    cli.write_output(export, ovn_nb, sys.stdout, output_format=args.format)
+
+
+if __name__ == '__main__':
+    main()
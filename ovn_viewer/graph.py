@@ -0,0 +1,247 @@
+# Copyright (c) 2020 Fistro Co.
+
+import argparse
+import sys
+import uuid as uuidlib
+from xml.sax import saxutils
+
+from ovn_viewer import cli
+from ovn_viewer import constants
+from ovn_viewer import treetypes
+
+
+FORMAT_DOT = 'dot'
+FORMAT_GRAPHML = 'graphml'
+FORMATS = (FORMAT_DOT, FORMAT_GRAPHML)
+# Graph items: ('node', ID, type, label, count) and ('edge', source ID,
+# target ID, kind). "count" is None except in the aggregated nodes.
+NODE = 'node'
+EDGE = 'edge'
+# Edge kinds: parent --> child element (e.g.: a switch port) and element -->
+# referenced element (e.g.: an ACL --> the address sets of its "match").
+CHILD = 'child'
+REFERENCE = 'reference'
+
+
+def _hidden_types(collapse):
+    """Return the types under a collapsed type, not walked"""
+    hidden = set()
+    for klass in treetypes.get_tree_types(constants.OVN_NORTHBOUND):
+        parent_type = klass.PARENT_TYPE
+        while parent_type:
+            if parent_type in collapse:
+                hidden.add(klass.TYPE)
+                break
+            parent_type = treetypes.get_tree_type(parent_type).PARENT_TYPE
+    return hidden
+
+
+class _References(object):
+    """Resolve the reference keys to the UUIDs of the elements shown
+
+    See "TreeType.reference_keys". The names are resolved with a name -->
+    UUIDs map, built the first time a type is referenced by name; the
+    referenced types are small (e.g.: Port_Groups, Address_Sets).
+    """
+
+    def __init__(self, root_tree, shown_types, root_uuid=None):
+        self._root_tree = root_tree
+        self._shown_types = shown_types
+        self._root_uuid = root_uuid
+        self._names = {}  # Type --> {name: [UUIDs]}
+
+    def _get_uuids(self, item_type, name):
+        names = self._names.get(item_type)
+        if names is None:
+            names = self._names[item_type] = {}
+            api = self._root_tree.get_api(
+                treetypes.get_tree_type(item_type).SCHEMA)
+            for row in list(api.tables[item_type].rows.values()):
+                names.setdefault(row.name, []).append(str(row.uuid))
+        return names.get(name, ())
+
+    def _in_subtree(self, uuid):
+        path = self._root_tree.get_path(uuid)
+        return bool(path) and any(path_uuid == self._root_uuid
+                                  for _, path_uuid in path)
+
+    def resolve(self, key):
+        item_type, value = key
+        if item_type not in self._shown_types:
+            return []
+        try:
+            uuids = [str(uuidlib.UUID(value))]
+        except ValueError:
+            uuids = self._get_uuids(item_type, value)
+        if self._root_uuid:
+            uuids = [uuid for uuid in uuids if self._in_subtree(uuid)]
+        return uuids
+
+
+def _aggregates(parent_id, counts):
+    for item_type, count in sorted(counts.items()):
+        node_id = '%s:%s' % (parent_id or 'all', item_type)
+        yield NODE, node_id, item_type, '%d %s' % (count, item_type), count
+        if parent_id:
+            yield EDGE, parent_id, node_id, CHILD
+
+
+def graph_items(root_tree, root_uuid=None, types=None, collapse=()):
+    """Yield the nodes and edges of the topology graph, as walked
+
+    The graph is streamed from "RootTree.walk": only the ancestors of the
+    element being visited are kept, with the counters of their collapsed
+    children.
+    - root_uuid: only this element and its subtree.
+    - types: only the elements of these types; an element whose parent is
+      not shown is linked to its nearest ancestor shown.
+    - collapse: the elements of these types are not shown but counted, a
+      node per parent and type (e.g.: "120 Logical_Switch_Port"); their
+      subtrees are not walked.
+    The references to elements not shown are not written.
+    """
+    collapse = set(collapse)
+    types = set(types or (klass.TYPE for klass in treetypes.get_tree_types(
+        constants.OVN_NORTHBOUND))) - _hidden_types(collapse)
+    references = _References(root_tree, types - collapse,
+                             root_uuid=root_uuid)
+    ancestors = []  # Per depth: [node ID or None, {collapsed type: count}]
+    top_counts = {}
+    for depth, tree_type, row, _ in root_tree.walk(root_uuid=root_uuid,
+                                                   leaf_types=collapse):
+        while len(ancestors) > depth:
+            node_id, counts = ancestors.pop()
+            yield from _aggregates(node_id, counts)
+        parent = next((ancestor for ancestor in reversed(ancestors)
+                       if ancestor[0]), (None, top_counts))
+        ancestors.append([None, {}])
+        if tree_type.TYPE not in types:
+            continue
+        if tree_type.TYPE in collapse:
+            parent[1][tree_type.TYPE] = parent[1].get(tree_type.TYPE, 0) + 1
+            continue
+        node_id = ancestors[-1][0] = str(row.uuid)
+        yield (NODE, node_id, tree_type.TYPE, tree_type.leaf_text(row),
+               None)
+        if parent[0]:
+            yield EDGE, parent[0], node_id, CHILD
+        for key in tree_type.references(row):
+            for uuid in references.resolve(key):
+                yield EDGE, node_id, uuid, REFERENCE
+
+    while ancestors:
+        node_id, counts = ancestors.pop()
+        yield from _aggregates(node_id, counts)
+    yield from _aggregates(None, top_counts)
+
+
+def _dot_string(text):
+    return '"%s"' % text.replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n')
+
+
+def _write_dot(items, output):
+    output.write('digraph ovn {\n    node [shape=box];\n')
+    for item in items:
+        if item[0] == NODE:
+            _, node_id, item_type, label, count = item
+            output.write('    %s [label=%s%s];\n' % (
+                _dot_string(node_id),
+                _dot_string('%s\n%s' % (item_type, label) if count is None
+                            else label),
+                ', shape=folder' if count is not None else ''))
+        else:
+            _, source, target, kind = item
+            output.write('    %s -> %s%s;\n' % (
+                _dot_string(source), _dot_string(target),
+                ' [style=dashed]' if kind == REFERENCE else ''))
+    output.write('}\n')
+
+
+def _write_graphml(items, output):
+    output.write(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+        '  <key id="type" for="node" attr.name="type" attr.type="string"/>\n'
+        '  <key id="label" for="node" attr.name="label" '
+        'attr.type="string"/>\n'
+        '  <key id="count" for="node" attr.name="count" attr.type="int"/>\n'
+        '  <key id="kind" for="edge" attr.name="kind" attr.type="string"/>\n'
+        '  <graph id="ovn" edgedefault="directed">\n')
+    for item in items:
+        if item[0] == NODE:
+            _, node_id, item_type, label, count = item
+            output.write(
+                '    <node id=%s><data key="type">%s</data>'
+                '<data key="label">%s</data>%s</node>\n' % (
+                    saxutils.quoteattr(node_id), saxutils.escape(item_type),
+                    saxutils.escape(label),
+                    '<data key="count">%d</data>' % count
+                    if count is not None else ''))
+        else:
+            _, source, target, kind = item
+            output.write(
+                '    <edge source=%s target=%s><data key="kind">%s</data>'
+                '</edge>\n' % (saxutils.quoteattr(source),
+                               saxutils.quoteattr(target), kind))
+    output.write('  </graph>\n</graphml>\n')
+
+
+_WRITERS = {FORMAT_DOT: _write_dot,
+            FORMAT_GRAPHML: _write_graphml}
+
+
+def export(ovn_nb, output, output_format=FORMAT_DOT, root_uuid=None,
+           types=None, collapse=()):
+    """Stream the topology graph to a file, as the tree is walked
+
+    See "graph_items" for the filters; neither a Treeview nor the RootTree
+    elements are built.
+    """
+    root_tree = treetypes.RootTree(None)
+    root_tree.update_ovn_connections(ovn_nb, None)
+    _WRITERS[output_format](
+        graph_items(root_tree, root_uuid=root_uuid, types=types,
+                    collapse=collapse), output)
+
+
+def parse_args():
+    nb_types = [klass.TYPE for klass in
+                treetypes.get_tree_types(constants.OVN_NORTHBOUND)]
+    parser = argparse.ArgumentParser(
+        description='Write the OVN topology graph (the elements, their '
+                    'children and the elements they refer to) to the '
+                    'standard output, without a display; by default the NB '
+                    'database is read from the OVN connection')
+    parser.add_argument(
+        '--format', choices=FORMATS, default=FORMAT_DOT,
+        help='"dot": Graphviz; "graphml": GraphML XML (default: '
+             '%(default)s)')
+    parser.add_argument(
+        '--root', metavar='UUID',
+        help='Write only an element and its subtree')
+    parser.add_argument(
+        '--type', dest='types', action='append', choices=nb_types,
+        metavar='TYPE',
+        help='Write only the elements of this type; can be repeated. Types: '
+             '%s' % ', '.join(nb_types))
+    parser.add_argument(
+        '--collapse', action='append', default=[], choices=nb_types,
+        metavar='TYPE',
+        help='Write the number of elements of this type per parent instead '
+             'of the elements, e.g.: "--collapse %s"; can be repeated' %
+             constants.LOGICAL_SWITCH_PORT)
+    cli.add_source_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    ovn_nb = cli.load_source(args)
+    cli.write_output(export, ovn_nb, sys.stdout, output_format=args.format,
+                     root_uuid=args.root, types=args.types,
+                     collapse=args.collapse)
+
+
+if __name__ == '__main__':
+    main()
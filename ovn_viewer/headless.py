@@ -0,0 +1,60 @@
+# Copyright (c) 2020 Fistro Co.
+
+import itertools
+
+
+class HeadlessTreeview(object):
+    """In memory stand-in of the "ttk.Treeview" methods the tree uses
+
+    Allows to build a RootTree without a display (e.g.: in the benchmarks).
+    The children are kept in dictionaries, like in the Tk widget, the cost of
+    a deletion does not depend on the number of siblings.
+    """
+
+    def __init__(self):
+        # Item ID --> [parent, {child: None}, options]
+        self._items = {'': [None, {}, {}]}
+        self._counter = itertools.count(1)
+
+    def __len__(self):
+        return len(self._items) - 1
+
+    def insert(self, parent, index, iid=None, **options):
+        if iid is None:
+            iid = 'I%03X' % next(self._counter)
+        if iid in self._items:
+            raise ValueError('Item %s already exists' % iid)
+        siblings = self._items[parent][1]
+        if index == 'end' or int(index) >= len(siblings):
+            siblings[iid] = None
+        else:
+            items = list(siblings)
+            items.insert(int(index), iid)
+            siblings.clear()
+            siblings.update(dict.fromkeys(items))
+        self._items[iid] = [parent, {}, options]
+        return iid
+
+    def delete(self, *items):
+        for iid in items:
+            parent, children, _ = self._items.pop(iid)
+            del self._items[parent][1][iid]
+            pending = list(children)
+            while pending:
+                pending.extend(self._items.pop(pending.pop())[1])
+
+    def exists(self, iid):
+        return iid in self._items
+
+    def parent(self, iid):
+        return self._items[iid][0]
+
+    def get_children(self, item=''):
+        return tuple(self._items[item][1])
+
+    def item(self, iid, option=None, **options):
+        if options:
+            self._items[iid][2].update(options)
+            return
+        item = dict(self._items[iid][2])
+        return item[option] if option else item
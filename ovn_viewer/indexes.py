@@ -0,0 +1,128 @@
+# Copyright (c) 2020 Fistro Co.
+
+import bisect
+import collections
+import re
+
+
+# Separators of the words indexed by SearchIndex; the MACs, IP addresses and
+# CIDRs, UUIDs and "match" fields (e.g.: "ip4.dst") are single words; the
+# "@" and "$" of the port group and address set names are removed.
+_WORD_SEPARATORS = re.compile(r'[\s"\'=&|!(),{}\[\]<>@$]+')
+
+
+def split_words(text):
+    """Return the lower case words of a text"""
+    return [word for word in _WORD_SEPARATORS.split(text.lower()) if word]
+
+
+class RowIndex(object):
+    """Index the rows of a table by the keys computed from each row
+
+    "keys_func" receives a row and returns an iterable of keys. The index
+    keeps the reverse map (row UUID --> keys) too, so a row can be re-indexed
+    or removed without knowing the keys it had before.
+    """
+
+    def __init__(self, keys_func):
+        self._keys_func = keys_func
+        self._index = collections.defaultdict(set)
+        self._row_keys = {}
+
+    def build(self, rows):
+        self.start_build()
+        for row in rows:
+            self.update(row)
+        self.finish_build()
+
+    def start_build(self):
+        """Empty the index, then built with "update" and "finish_build"
+
+        The index can be built in several steps (e.g.: see
+        "RootTree.build_search_index").
+        """
+        self._index.clear()
+        self._row_keys.clear()
+
+    def finish_build(self):
+        """Complete an index built with "start_build" and "update\""""
+
+    def update(self, row):
+        self.delete(row)
+        keys = frozenset(self._keys_func(row))
+        if not keys:
+            return
+        self._row_keys[row.uuid] = keys
+        for key in keys:
+            self._index[key].add(row.uuid)
+
+    def delete(self, row):
+        for key in self._row_keys.pop(row.uuid, ()):
+            uuids = self._index[key]
+            uuids.discard(row.uuid)
+            if not uuids:
+                del self._index[key]
+
+    def get(self, key):
+        """Return the UUIDs of the rows indexed under "key"."""
+        return self._index.get(key, ())
+
+
+class SearchIndex(RowIndex):
+    """Inverted index of the words of the rows, searched by word prefix
+
+    "keys_func" returns the words of a row (see "split_words"). The indexed
+    words are kept sorted too, thus the words starting with a prefix are
+    found with a binary search instead of scanning the index.
+    """
+
+    def __init__(self, keys_func):
+        super(SearchIndex, self).__init__(keys_func)
+        self._words = None  # Sorted; None while building the index.
+
+    def start_build(self):
+        super(SearchIndex, self).start_build()
+        self._words = None
+
+    def finish_build(self):
+        self._words = sorted(self._index)
+
+    def update(self, row):
+        super(SearchIndex, self).update(row)
+        if self._words is None:
+            return
+        for word in self._row_keys.get(row.uuid, ()):
+            idx = bisect.bisect_left(self._words, word)
+            if idx == len(self._words) or self._words[idx] != word:
+                self._words.insert(idx, word)
+
+    def delete(self, row):
+        words = self._row_keys.get(row.uuid, ())
+        super(SearchIndex, self).delete(row)
+        if self._words is None:
+            return
+        for word in words:
+            if word not in self._index:
+                del self._words[bisect.bisect_left(self._words, word)]
+
+    def _prefix_search(self, prefix):
+        uuids = set()
+        idx = bisect.bisect_left(self._words, prefix)
+        while idx < len(self._words) and self._words[idx].startswith(prefix):
+            uuids |= self._index[self._words[idx]]
+            idx += 1
+        return uuids
+
+    def search(self, text):
+        """Return the UUIDs of the rows matching all the words of a text
+
+        A row matches a word if any of its words starts with it.
+        """
+        result = None
+        # The longest words first, usually the most selective ones.
+        for prefix in sorted(set(split_words(text)), key=len, reverse=True):
+            uuids = self._prefix_search(prefix)
+            result = uuids if result is None else result & uuids
+            if not result:
+                break
+        return result or set()
@@ -0,0 +1,127 @@
+# Copyright (c) 2020 Fistro Co.
+
+import contextlib
+import functools
+import json
+import threading
+import time
+
+
+class Recorder(object):
+    """Counters and cumulative times of the instrumented operations
+
+    The operations can be recorded from any thread (e.g.: "OvnIdl.notify" is
+    called from the IDL thread). When the recorder is disabled, an
+    instrumented call only checks the "enabled" flag. The times are
+    inclusive: "populate_subtree" includes the Treeview insertions.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._stats = {}  # Name --> [count, total seconds, max seconds]
+        self._drained = []  # Push times of the events not rendered yet.
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def drained(self, push_times):
+        """Register the push times of the events drained from the queue"""
+        self._drained += push_times
+
+    def rendered(self):
+        """Record the lag of the drained events, once applied to the tree"""
+        now = time.monotonic()
+        drained, self._drained = self._drained, []
+        for push_time in drained:
+            self.record('IDL event lag', now - push_time)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+        self._drained = []
+
+    def get_stats(self):
+        """Return {name: {count, total, mean, max}}, times in seconds"""
+        with self._lock:
+            return {name: {'count': count, 'total': total,
+                           'mean': total / count, 'max': max_time}
+                    for name, (count, total, max_time) in
+                    self._stats.items()}
+
+    def format_stats(self):
+        lines = ['%-40s %9s %10s %10s %10s' % ('operation', 'count',
+                                               'total s', 'mean ms',
+                                               'max ms')]
+        for name, stats in sorted(self.get_stats().items()):
+            lines.append('%-40s %9d %10.3f %10.3f %10.3f' % (
+                name, stats['count'], stats['total'], stats['mean'] * 1000,
+                stats['max'] * 1000))
+        return '\n'.join(lines)
+
+    def write_json(self, stream, **extra):
+        """Write the current stats as a JSON line"""
+        line = {'time': time.time(), 'stats': self.get_stats()}
+        line.update(extra)
+        stream.write(json.dumps(line, sort_keys=True) + '\n')
+        stream.flush()
+
+
+RECORDER = Recorder()
+
+
+def enabled():
+    return RECORDER.enabled
+
+
+def _timed(func, name):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not RECORDER.enabled:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            RECORDER.record(name, time.perf_counter() - start)
+    return wrapper
+
+
+def timed(func):
+    """Decorator recording the calls of a function, by its qualified name"""
+    return _timed(func, func.__qualname__)
+
+
+@contextlib.contextmanager
+def timer(name):
+    """Context manager recording the time of a block"""
+    if not RECORDER.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        RECORDER.record(name, time.perf_counter() - start)
+
+
+class TreeviewRecorder(object):
+    """Treeview proxy recording the operations the tree uses"""
+
+    OPERATIONS = ('insert', 'delete', 'item', 'get_children')
+
+    def __init__(self, treeview):
+        self._treeview = treeview
+        for operation in self.OPERATIONS:
+            setattr(self, operation,
+                    _timed(getattr(treeview, operation),
+                           'Treeview.%s' % operation))
+
+    def __getattr__(self, name):
+        return getattr(self._treeview, name)
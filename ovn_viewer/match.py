@@ -0,0 +1,372 @@
+# Copyright (c) 2020 Fistro Co.
+
+import bisect
+import functools
+import ipaddress
+import re
+
+from ovn_viewer import constants
+from ovn_viewer import indexes
+
+
+_TOKENS = re.compile(r'''
+    (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<op>==|!=|<=|>=|&&|\|\||[<>!(){},])
+  | (?P<ref>[$@][\w.]+)
+  | (?P<word>[\w.:/\-]+)
+  | (?P<other>\S)''', re.VERBOSE)
+_FIELD = re.compile(r'[a-zA-Z_][\w]*(\.[a-zA-Z_][\w]*)*$')
+_RELATIONS = ('==', '!=', '<', '<=', '>', '>=')
+_IP_FIELDS = ('ip4.src', 'ip4.dst', 'ip6.src', 'ip6.dst')
+_PORT_FIELDS = ('inport', 'outport')
+L4_PROTOCOLS = ('tcp', 'udp', 'sctp')
+_L4_FIELDS = tuple('%s.%s' % (protocol, direction) for protocol in
+                   L4_PROTOCOLS for direction in ('src', 'dst'))
+PROTOCOLS = L4_PROTOCOLS + ('ip', 'ip4', 'ip6', 'icmp', 'icmp4', 'icmp6',
+                            'arp', 'nd')
+_MAX_L4_PORT = 65535
+
+
+class Match(object):
+    """Fields of an OVN match expression, to be indexed
+
+    Only the positive comparisons are kept: neither the "!=" ones nor the
+    ones in a negated expression. The boolean structure is not kept either:
+    "ip4.src == 10.0.0.0/8 || ip4.dst == 10.0.0.0/8" has both prefixes. The
+    fields are tuples, in the expression order.
+    - protocols: the PROTOCOLS used, e.g.: "ip4", "tcp" (from "tcp.dst").
+    - ports: the "inport" and "outport" names.
+    - port_groups, address_sets: the "@" and "$" names referenced.
+    - networks: the "ip4.src" ... "ip6.dst" prefixes, as ip_network.
+    - l4_ports: (protocol, first port, last port) of the TCP/UDP/SCTP
+      ports; the ">=" and "<=" bounds of a field are paired in order.
+    """
+
+    __slots__ = ('protocols', 'ports', 'port_groups', 'address_sets',
+                 'networks', 'l4_ports')
+
+    def __init__(self, protocols=(), ports=(), port_groups=(),
+                 address_sets=(), networks=(), l4_ports=()):
+        self.protocols = protocols
+        self.ports = ports
+        self.port_groups = port_groups
+        self.address_sets = address_sets
+        self.networks = networks
+        self.l4_ports = l4_ports
+
+
+def _tokenize(text):
+    for token in _TOKENS.finditer(text):
+        kind = token.lastgroup
+        value = token.group(kind)
+        if kind == 'string':
+            value = value[1:-1].replace('\\"', '"')
+        yield kind, value
+
+
+def _unique(items):
+    return tuple(dict.fromkeys(items))
+
+
+@functools.lru_cache(maxsize=constants.MATCH_CACHE_SIZE)
+def parse_network(text):
+    """Return the ip_network of an address or prefix, None if it is not"""
+    try:
+        return ipaddress.ip_network(text, strict=False)
+    except ValueError:
+        return
+
+
+def _parse_l4_port(text):
+    try:
+        port = int(text, 0)
+    except ValueError:
+        return  # E.g.: a masked port, "1024/0xfc00".
+    return port if 0 <= port <= _MAX_L4_PORT else None
+
+
+class _Parser(object):
+    """Collect the positive comparisons of a match, see "Match\""""
+
+    def __init__(self, text):
+        self._tokens = list(_tokenize(text))
+        self._pos = 0
+        self.fields = {'protocols': [], 'ports': [], 'port_groups': [],
+                       'address_sets': [], 'networks': [], 'l4_ports': []}
+        self._bounds = {}  # L4 field --> [[first, last], ...]
+
+    def _next(self):
+        token = self._tokens[self._pos]
+        self._pos += 1
+        return token
+
+    def _peek(self):
+        if self._pos < len(self._tokens):
+            return self._tokens[self._pos]
+        return None, None
+
+    def _values(self):
+        """Read a value or a {set} of values"""
+        if self._peek() != ('op', '{'):
+            return [self._next()] if self._peek()[0] else []
+        self._next()
+        values = []
+        while self._peek()[0] and self._peek() != ('op', '}'):
+            token = self._next()
+            if token != ('op', ','):
+                values.append(token)
+        if self._peek()[0]:
+            self._next()
+        return values
+
+    def parse(self):
+        negated = [False]  # Per parenthesis level.
+        negate_next = False
+        while self._pos < len(self._tokens):
+            kind, value = self._next()
+            if (kind, value) == ('op', '!'):
+                negate_next = not negate_next
+                continue
+            if (kind, value) == ('op', '('):
+                negated.append(negated[-1] != negate_next)
+            elif (kind, value) == ('op', ')'):
+                if len(negated) > 1:
+                    negated.pop()
+            elif kind == 'word' and _FIELD.match(value):
+                is_negated = negated[-1] != negate_next
+                if (self._peek()[0] == 'op' and
+                        self._peek()[1] in _RELATIONS):
+                    relation = self._next()[1]
+                    values = self._values()
+                    if not is_negated and relation != '!=':
+                        self._add_comparison(value, relation, values)
+                elif not is_negated and value in PROTOCOLS:
+                    self.fields['protocols'].append(value)
+            negate_next = False
+
+        for (protocol, _), ranges in self._bounds.items():
+            self.fields['l4_ports'] += [(protocol, first, last) for
+                                        first, last in ranges]
+        return Match(**{name: _unique(values) for name, values in
+                        self.fields.items()})
+
+    def _add_comparison(self, field, relation, values):
+        if field.split('.')[0] in PROTOCOLS:
+            self.fields['protocols'].append(field.split('.')[0])
+        for kind, value in values:
+            if kind == 'ref':
+                self.fields['port_groups' if value[0] == '@' else
+                            'address_sets'].append(value[1:])
+            elif field in _PORT_FIELDS and relation == '==':
+                self.fields['ports'].append(value)
+            elif field in _IP_FIELDS and relation == '==':
+                network = parse_network(value)
+                if network:
+                    self.fields['networks'].append(network)
+            elif field in _L4_FIELDS:
+                self._add_l4_port(field, relation, _parse_l4_port(value))
+
+    def _add_l4_port(self, field, relation, port):
+        if port is None:
+            return
+        protocol = field.split('.')[0]
+        if relation == '==':
+            self.fields['l4_ports'].append((protocol, port, port))
+            return
+        if relation in ('>', '<'):
+            port += 1 if relation == '>' else -1
+        ranges = self._bounds.setdefault((protocol, field), [])
+        if relation in ('>=', '>'):
+            ranges.append([port, _MAX_L4_PORT])
+        elif ranges and ranges[-1][1] == _MAX_L4_PORT:
+            ranges[-1][1] = port  # The upper bound of the last range.
+        else:
+            ranges.append([0, port])
+
+
+@functools.lru_cache(maxsize=constants.MATCH_CACHE_SIZE)
+def parse(text):
+    """Return the Match of an OVN match expression
+
+    The results are cached by text: many rules have the same match (e.g.:
+    the ACLs of the same security group rule in each port group). The
+    parser is lenient; the tokens not understood are skipped.
+    """
+    return _Parser(text).parse()
+
+
+def parse_query(text):
+    """Return the terms of a rules query, e.g.: "10.0.0.0/24 tcp/22"
+
+    Each word is a term: (kind, value) tuples.
+    - An address or prefix: ('network', ip_network).
+    - "tcp/22" or "udp/1000-2000": ('l4_ports', (protocol, first, last)).
+    - "$name", "@name": ('address_sets', name), ('port_groups', name).
+    - A protocol field, e.g.: "tcp", "ip6": ('protocols', name).
+    - Anything else, a port name: ('ports', name).
+    """
+    terms = []
+    for word in text.split():
+        protocol, _, ports = word.partition('/')
+        first, _, last = ports.partition('-')
+        network = parse_network(word)
+        if network:
+            terms.append(('network', network))
+        elif protocol in L4_PROTOCOLS and ports:
+            first, last = _parse_l4_port(first), _parse_l4_port(last or first)
+            if first is None or last is None:
+                raise ValueError('Invalid port range %s' % word)
+            terms.append(('l4_ports', (protocol, first, last)))
+        elif word[0] in '$@':
+            terms.append(('address_sets' if word[0] == '$' else 'port_groups',
+                          word[1:]))
+        elif word in PROTOCOLS:
+            terms.append(('protocols', word))
+        else:
+            terms.append(('ports', word))
+    return terms
+
+
+def _network_key(network):
+    return (network.version, int(network.network_address), network.prefixlen,
+            network)
+
+
+class NetworkIndex(indexes.RowIndex):
+    """Index of the rows by IP prefix, searched by overlapping prefix
+
+    "keys_func" returns the ip_networks of a row. Like the SearchIndex words,
+    the indexed prefixes are kept sorted too: the ones inside a queried
+    prefix are found with a binary search, the ones containing it with a
+    hash lookup per prefix length.
+    """
+
+    def __init__(self, keys_func):
+        super(NetworkIndex, self).__init__(keys_func)
+        # Sorted (version, address, length, network); None while building.
+        self._networks = None
+
+    def start_build(self):
+        super(NetworkIndex, self).start_build()
+        self._networks = None
+
+    def finish_build(self):
+        self._networks = sorted(map(_network_key, self._index))
+
+    def update(self, row):
+        super(NetworkIndex, self).update(row)
+        if self._networks is None:
+            return
+        for network in self._row_keys.get(row.uuid, ()):
+            entry = _network_key(network)
+            idx = bisect.bisect_left(self._networks, entry)
+            if idx == len(self._networks) or self._networks[idx] != entry:
+                self._networks.insert(idx, entry)
+
+    def delete(self, row):
+        networks = self._row_keys.get(row.uuid, ())
+        super(NetworkIndex, self).delete(row)
+        if self._networks is None:
+            return
+        for network in networks:
+            if network not in self._index:
+                del self._networks[bisect.bisect_left(
+                    self._networks, _network_key(network))]
+
+    def search(self, network):
+        """Return the UUIDs of the rows with a prefix overlapping a prefix"""
+        uuids = set()
+        for prefixlen in range(network.prefixlen + 1):  # Containing it.
+            uuids.update(self.get(network.supernet(new_prefix=prefixlen)))
+        version, first, prefixlen, _ = _network_key(network)
+        last = int(network.broadcast_address)
+        idx = bisect.bisect_left(self._networks, (version, first))
+        while (idx < len(self._networks) and
+               self._networks[idx][:2] <= (version, last)):
+            if self._networks[idx][2] > prefixlen:  # Inside it.
+                uuids.update(self.get(self._networks[idx][3]))
+            idx += 1
+        return uuids
+
+
+class MatchIndex(indexes.RowIndex):
+    """Index of the parsed "match" fields of the ACL and QoS rows
+
+    The names, protocols and single L4 ports are hash keys; the prefixes
+    are in a NetworkIndex. The L4 port ranges are checked one by one, only
+    the rules having a range.
+    """
+
+    def __init__(self):
+        super(MatchIndex, self).__init__(self._keys)
+        self._networks = NetworkIndex(
+            lambda row: parse(row.match).networks)
+        self._ranges = {}  # Row UUID --> L4 port ranges.
+
+    def _keys(self, row):
+        match = parse(row.match)
+        keys = [(field, value) for field in
+                ('protocols', 'ports', 'port_groups', 'address_sets')
+                for value in getattr(match, field)]
+        ranges = []
+        for protocol, first, last in match.l4_ports:
+            if first == last:
+                keys.append(('l4_port', (protocol, first)))
+            else:
+                keys.append(('l4_range', protocol))
+                ranges.append((protocol, first, last))
+        if ranges:
+            self._ranges[row.uuid] = ranges
+        return keys
+
+    def start_build(self):
+        super(MatchIndex, self).start_build()
+        self._networks.start_build()
+        self._ranges.clear()
+
+    def finish_build(self):
+        self._networks.finish_build()
+
+    def update(self, row):
+        super(MatchIndex, self).update(row)
+        self._networks.update(row)
+
+    def delete(self, row):
+        super(MatchIndex, self).delete(row)
+        self._networks.delete(row)
+        self._ranges.pop(row.uuid, None)
+
+    def _find_l4_ports(self, protocol, first, last):
+        uuids = set()
+        for port in range(first, last + 1):
+            uuids.update(self.get(('l4_port', (protocol, port))))
+        for uuid in self.get(('l4_range', protocol)):
+            if any(_protocol == protocol and _first <= last and
+                   first <= _last for _protocol, _first, _last in
+                   self._ranges[uuid]):
+                uuids.add(uuid)
+        return uuids
+
+    def search(self, text, address_sets=None):
+        """Return the UUIDs of the rules matching all the terms of a query
+
+        See "parse_query". A rule matches a term if its match has a field
+        overlapping it: e.g.: "10.0.0.0/24" matches "ip4.src == 10.0.0.5"
+        and "ip4.dst == 10.0.0.0/8", not a rule without prefixes. Optionally,
+        "address_sets" returns the names of the address sets with addresses
+        overlapping a prefix; the rules using them match the prefix too.
+        """
+        result = None
+        for kind, value in parse_query(text):
+            if kind == 'network':
+                uuids = self._networks.search(value)
+                for name in address_sets(value) if address_sets else ():
+                    uuids.update(self.get(('address_sets', name)))
+            elif kind == 'l4_ports':
+                uuids = self._find_l4_ports(*value)
+            else:
+                uuids = set(self.get((kind, value)))
+            result = uuids if result is None else result & uuids
+            if not result:
+                break
+        return result or set()
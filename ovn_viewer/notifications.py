@@ -0,0 +1,68 @@
+# Copyright (c) 2020 Fistro Co.
+
+import collections
+import threading
+import time
+
+from ovsdbapp import event as ovs_event
+
+from ovn_viewer import instrumentation
+
+
+ROW_CREATE = ovs_event.RowEvent.ROW_CREATE
+ROW_UPDATE = ovs_event.RowEvent.ROW_UPDATE
+ROW_DELETE = ovs_event.RowEvent.ROW_DELETE
+
+# (previous event, new event) --> resulting event. A row created and deleted
+# is still deleted: the tree and the indexes could have read it from the IDL
+# before the events are drained (e.g.: an index built or a leaf opened).
+_COALESCE = {
+    (ROW_CREATE, ROW_UPDATE): ROW_CREATE,
+    (ROW_CREATE, ROW_DELETE): ROW_DELETE,
+    (ROW_UPDATE, ROW_UPDATE): ROW_UPDATE,
+    (ROW_UPDATE, ROW_DELETE): ROW_DELETE,
+    (ROW_DELETE, ROW_CREATE): ROW_UPDATE,
+}
+
+
+class NotificationQueue(object):
+    """Queue of IDL row events, from the IDL thread to the Tk main loop
+
+    The IDL connection thread pushes the row events and the Tk main loop
+    drains them periodically (see "OvnViewer._process_notifications"). The
+    events of the same row are coalesced, thus a row is present only once in
+    the queue, with the latest row and the resulting event.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = collections.OrderedDict()  # Row UUID --> (event, row)
+        # Row UUID --> time of the first event pushed, if instrumented.
+        self._push_times = {}
+
+    def push(self, event, row):
+        with self._lock:
+            previous = self._events.pop(row.uuid, None)
+            if previous:
+                event = _COALESCE.get((previous[0], event), event)
+            self._events[row.uuid] = (event, row)
+            if instrumentation.enabled():
+                self._push_times.setdefault(row.uuid, time.monotonic())
+
+    def drain(self, limit=None):
+        """Return the oldest (event, row) tuples, up to "limit" if defined"""
+        with self._lock:
+            if limit is None or limit >= len(self._events):
+                events, self._events = self._events, collections.OrderedDict()
+                events = list(events.values())
+            else:
+                events = [self._events.popitem(last=False)[1]
+                          for _ in range(limit)]
+            if self._push_times:
+                instrumentation.RECORDER.drained(
+                    [self._push_times.pop(row.uuid) for _, row in events
+                     if row.uuid in self._push_times])
+            return events
+
+    def __len__(self):
+        return len(self._events)
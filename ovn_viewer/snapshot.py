@@ -0,0 +1,197 @@
+# Copyright (c) 2020 Fistro Co.
+
+import json
+import os
+import time
+import uuid as uuidlib
+
+from ovn_viewer import constants
+from ovn_viewer import treetypes
+
+
+SNAPSHOT_FORMAT = 'ovn_viewer-snapshot'
+# Increased when the tree types use new columns, not stored by older versions
+# (2: the Logical_Switch_Port "options" and the Port_Group "ports").
+SNAPSHOT_VERSION = 2
+
+
+class RowReference(object):
+    """Reference to a row not present in the snapshot"""
+
+    def __init__(self, uuid):
+        self.uuid = uuid
+
+    def __str__(self):
+        return str(self.uuid)
+
+    __repr__ = __str__
+
+
+class SnapshotRow(object):
+    """Database row of a snapshot, read like an IDL row
+
+    The column values are kept encoded (see "encode") and decoded when read;
+    the references to other rows are resolved then, like the IDL does.
+    """
+
+    __slots__ = ('_snapshot', '_table', 'uuid', '_columns')
+
+    def __init__(self, snapshot, table, uuid, columns):
+        self._snapshot = snapshot
+        self._table = table
+        self.uuid = uuid
+        self._columns = columns
+
+    def __getattr__(self, name):
+        try:
+            value = self._columns[name]
+        except KeyError:
+            raise AttributeError(name)
+        return self._snapshot.decode(value)
+
+    def __repr__(self):
+        return '%s(%s)' % (self._table.name, self.uuid)
+
+
+class SnapshotTable(object):
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = {}
+
+
+class Snapshot(object):
+    """Database snapshot, with the same tables interface as the IDL
+
+    The file is a JSON lines file: a header line and then one line per row,
+    [table, UUID, {column: value}], with the values encoded like in OVSDB
+    ("uuid", "set" and "map" arrays).
+    """
+
+    def __init__(self, schema_name=constants.OVN_NORTHBOUND, created=None):
+        self.schema_name = schema_name
+        self.created = created
+        self._rows = {}  # All the rows, to resolve the references.
+        # The tables without rows are not stored but read anyway by the tree.
+        self.tables = {
+            table_name: SnapshotTable(table_name) for table_name in
+            treetypes.get_registered_tables(schema_name)}
+
+    def get_table(self, table_name):
+        try:
+            return self.tables[table_name]
+        except KeyError:
+            table = self.tables[table_name] = SnapshotTable(table_name)
+            return table
+
+    def add_row(self, table_name, uuid, columns):
+        table = self.get_table(table_name)
+        row = SnapshotRow(self, table, uuid, columns)
+        table.rows[uuid] = self._rows[uuid] = row
+        return row
+
+    def delete_row(self, uuid):
+        row = self._rows.pop(uuid, None)
+        if row:
+            del row._table.rows[uuid]
+
+    def get_row(self, uuid):
+        return self._rows.get(uuid)
+
+    def row_columns(self, uuid):
+        """Return the encoded column values of a row, to be modified"""
+        return self._rows[uuid]._columns
+
+    def decode(self, value):
+        if not isinstance(value, list):
+            return value
+        tag, value = value
+        if tag == 'uuid':
+            uuid = uuidlib.UUID(value)
+            return self._rows.get(uuid) or RowReference(uuid)
+        if tag == 'set':
+            return [self.decode(item) for item in value]
+        if tag == 'map':
+            return {self.decode(key): self.decode(item)
+                    for key, item in value}
+        raise ValueError('Unknown snapshot value %s' % tag)
+
+    @classmethod
+    def load(cls, path):
+        """Load a snapshot file, one row at a time"""
+        with open(path) as snapshot_file:
+            header = json.loads(snapshot_file.readline())
+            if (header.get('format') != SNAPSHOT_FORMAT or
+                    header.get('version') != SNAPSHOT_VERSION):
+                raise ValueError('%s is not a snapshot file' % path)
+            snapshot = cls(schema_name=header['schema'],
+                           created=header.get('created'))
+            for line in snapshot_file:
+                table_name, uuid, columns = json.loads(line)
+                snapshot.add_row(table_name, uuidlib.UUID(uuid), columns)
+        return snapshot
+
+
+def encode(value):
+    """Encode an IDL column value to be stored in a snapshot"""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, uuidlib.UUID):
+        return ['uuid', str(value)]
+    if isinstance(value, dict):
+        return ['map', [[encode(key), encode(item)]
+                        for key, item in value.items()]]
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return ['set', [encode(item) for item in value]]
+    return ['uuid', str(value.uuid)]  # A row.
+
+
+def save(ovn_api, path, schema_name=constants.OVN_NORTHBOUND):
+    """Write the rows and columns the viewer uses to a snapshot file
+
+    The rows are written one by one to a temporary file that replaces the
+    previous snapshot at the end.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    header = {'format': SNAPSHOT_FORMAT, 'version': SNAPSHOT_VERSION,
+              'schema': schema_name, 'created': time.time()}
+    tables = treetypes.get_registered_tables(schema_name)
+    with open(tmp_path, 'w') as snapshot_file:
+        snapshot_file.write(json.dumps(header) + '\n')
+        for table_name, columns in sorted(tables.items()):
+            table = ovn_api.tables.get(table_name)
+            if table is None:
+                continue
+            # Copied, the IDL thread could be changing the rows.
+            for row in list(table.rows.values()):
+                data = {column: encode(getattr(row, column))
+                        for column in sorted(columns)}
+                snapshot_file.write(json.dumps(
+                    [table_name, str(row.uuid), data],
+                    separators=(',', ':')) + '\n')
+    os.replace(tmp_path, path)
+
+
+def is_snapshot(path):
+    """Return True if a file starts with a snapshot header"""
+    # The "format" is the first key of the header written by "save".
+    start = '{"format": %s' % json.dumps(SNAPSHOT_FORMAT)
+    with open(path) as snapshot_file:
+        return snapshot_file.read(len(start)) == start
+
+
+def get_cache_path(cluster_name=constants.DEFAULT_CLUSTER):
+    """Return the path of the snapshot saved on exit, for a cluster"""
+    if cluster_name == constants.DEFAULT_CLUSTER:
+        return constants.SNAPSHOT_CACHE
+    base, ext = os.path.splitext(constants.SNAPSHOT_CACHE)
+    return '%s-%s%s' % (base, cluster_name.replace(os.sep, '_'), ext)
+
+
+def load_cache(cluster_name=constants.DEFAULT_CLUSTER):
+    """Return the snapshot saved in the last run, if any"""
+    try:
+        return Snapshot.load(get_cache_path(cluster_name))
+    except (OSError, ValueError):
+        return
@@ -2,26 +2,67 @@
 
 import abc
 import collections
-import re
+import itertools
+import sys
+import uuid as uuidlib
 
 from ovsdbapp.backend.ovs_idl import rowview
+from ovsdbapp import event as ovs_event
 
 from ovn_viewer import constants
+from ovn_viewer import indexes
+from ovn_viewer import instrumentation
+from ovn_viewer import match as ovn_match
+
+
+SEARCH_COLUMNS = ('name', 'external_ids', 'addresses', 'match')
+# OVN table --> TreeType class, in registration order.
+_TREE_TYPES = {}
+
+
+def register_tree_type(klass):
+    """Class decorator adding a tree type to the registry
+
+    A registered type is built in the tree (the top level type leafs are
+    inserted in the reverse registration order), receives the IDL events of
+    its table and registers its tables and columns in the IDL.
+    """
+    if klass.TYPE in _TREE_TYPES:
+        raise ValueError('Tree type of %s already registered' % klass.TYPE)
+    _TREE_TYPES[klass.TYPE] = klass
+    return klass
+
+
+def get_tree_type(table_name):
+    """Return the tree type of an OVN table, None if not registered"""
+    return _TREE_TYPES.get(table_name)
+
+
+def get_tree_types(schema_name=None):
+    """Return the registered tree types, all or of a database"""
+    return tuple(klass for klass in _TREE_TYPES.values() if
+                 schema_name is None or klass.SCHEMA == schema_name)
 
 
 class TreeType(object, metaclass=abc.ABCMeta):
 
     TYPE = None
+    PARENT_TYPE = None  # None for the top level types.
+    CHILD_TYPE = None
+    CHILD_COLUMN = None  # Column referencing the child rows, if any.
+    # Tables and columns registered in the IDL, see "get_registered_tables".
+    SCHEMA = constants.OVN_NORTHBOUND
+    TABLES = {}
 
     def __init__(self, root_tree, ovn_nb, ovn_sb, parent_leaf=None,
-                 parent_uuid=None):
+                 parent_uuid=None, own_leaf=None):
         self._root_tree = root_tree
         self._treeview = root_tree.treeview
         self._ovn_nb = ovn_nb
         self._ovn_sb = ovn_sb
         self._parent_leaf = parent_leaf or ''
         self._parent_uuid = parent_uuid
-        self._own_leaf = None
+        self._own_leaf = own_leaf
 
     @property
     def own_leaf(self):
@@ -36,11 +77,25 @@ class TreeType(object, metaclass=abc.ABCMeta):
                  -> logical_switch_1
                  -> logical_switch_2 ...
         """
+        if not self._own_leaf:
+            self._own_leaf = self._root_tree.get_header(self._parent_uuid,
+                                                        self.TYPE)
         if not self._own_leaf:
             self._own_leaf = self._treeview.insert(self._parent_leaf, '0',
                                                    text=self.TYPE)
+            self._root_tree.add_header(self._parent_uuid, self.TYPE,
+                                       self._own_leaf)
         return self._own_leaf
 
+    @property
+    def parent_uuid(self):
+        return self._parent_uuid
+
+    @property
+    def ovn_api(self):
+        """API of the database of the type, NB or SB"""
+        return self._root_tree.get_api(self.SCHEMA)
+
     @abc.abstractmethod
     def populate_subtree(self, uuids=None):
         """Add elements to the subtree leaves
@@ -51,165 +106,900 @@ class TreeType(object, metaclass=abc.ABCMeta):
         - "values": a list of variables but just with one element, the UUID
         """
 
+    def add_element(self, row):
+        """Add a single element leaf, and its children, to the subtree"""
+        uuid = str(row.uuid)
+        if self._root_tree.get_leaf(self.TYPE, uuid):
+            # An element has only one leaf; move it from its previous parent
+            # (e.g.: a QoS rule whose "match" port has changed).
+            self._root_tree.delete_leaf(row)
+        leaf = self._treeview.insert(
+            self.own_leaf, 'end', uuid, text=self.leaf_text(row),
+            tags=self.TYPE, values=uuid)
+        self.store_info(row)
+        self._add_children(row, leaf)
+        return leaf
+
+    def add_elements(self, uuids):
+        """Add the element leafs of a list of rows, a page at a time
+
+        Only the first TREE_PAGE_SIZE leafs are inserted; the other rows are
+        kept in a page, inserted when the pager leafs are opened (see
+        "RootTree.paginate"). If the type leaf has a page already, all the
+        rows are added to it.
+        """
+        self.insert_elements(self._root_tree.paginate(self, list(uuids)))
+        self._root_tree.update_pagers(
+            self._root_tree.get_header(self._parent_uuid, self.TYPE))
+
+    def insert_elements(self, uuids):
+        rows = self.ovn_api.tables[self.TYPE].rows
+        for uuid in uuids:
+            row = rows.get(uuid)
+            if row is not None:
+                self.add_element(rowview.RowView(row))
+
+    def leaf_text(self, row):
+        return str(row.uuid)
+
+    def get_parent_uuid(self, row):
+        """Return the parent element UUID of a row
+
+        Most elements are referenced from the parent row (e.g.: the
+        "Logical_Switch.ports"); these are linked when the parent row update
+        is received, thus this method returns the parent already linked, if
+        any.
+        """
+        return self._root_tree.get_parent_uuid(str(row.uuid))
+
+    def find_parent_uuid(self, row):
+        """Return the parent element UUID of a row, reading the database
+
+        Unlike "get_parent_uuid", the element could be not built yet (e.g.:
+        a search result under a leaf not opened).
+        """
+        for parent_uuid in self._root_tree.parent_index.get(str(row.uuid)):
+            return str(parent_uuid)
+
+    def child_uuids(self, row):
+        """Return the UUIDs of the child rows of an element"""
+        return ()
+
+    def linked_uuid(self, row):
+        """Return the UUID of a related element in another subtree, if any
+
+        E.g.: the Port_Binding of a Logical_Switch_Port.
+        """
+
+    @staticmethod
+    def references(row):
+        """Return the keys of the elements a row refers to
+
+        The child elements are not included. See "reference_keys".
+        """
+        return ()
+
+    @classmethod
+    def reference_keys(cls, row):
+        """Return the (type, UUID or name) keys an element is referred by"""
+        keys = [(cls.TYPE, str(row.uuid))]
+        name = getattr(row, 'name', None)
+        if name and isinstance(name, str):
+            keys.append((cls.TYPE, name))
+        return keys
+
+    def has_children(self, row):
+        """Return True if the element has child leafs"""
+        return bool(self.child_uuids(row))
+
+    def populate_children(self, row, leaf):
+        """Build the child subtrees of a single element"""
+
+    def _add_children(self, row, leaf):
+        """Build the element child subtrees, now or when the leaf is opened"""
+        if not self._root_tree.lazy:
+            self.populate_children(row, leaf)
+        elif self.has_children(row):
+            self._root_tree.defer(leaf, self.TYPE, row.uuid)
+
     @staticmethod
     @abc.abstractmethod
     def print_info(text_box, datum):
         """Print single element information in a string variable"""
 
     @abc.abstractmethod
-    def store_info(self, row, leaf):
-        """Store information for each element.
+    def get_datum(self, row):
+        """Return the element information printed by "print_info"
 
-        That will push into the root tree DB the datum and the treeview leaf.
+        Called when the element is selected; the information is read from the
+        row then, not stored in the tree.
         """
 
+    @instrumentation.timed
+    def store_info(self, row):
+        """Store the element, and its link to the parent, in the root tree"""
+        self._root_tree.add_leaf(self.TYPE, str(row.uuid), self._parent_uuid)
+
+
+class TreeElement(object):
+    """Element stored in the root tree, one per row leaf
+
+    The UUID strings are interned: the "_db" key, the "parent" of the children
+    and the "children" of the parent are the same object. The element leaf
+    is the UUID itself (see "TreeType.add_element").
+    """
+
+    __slots__ = ('type', 'parent', 'children')
+
+    def __init__(self, item_type, parent):
+        self.type = item_type
+        self.parent = parent
+        self.children = None  # Set of child UUIDs, created with the first.
+
+
+class Page(object):
+    """Rows of a type leaf not inserted yet, see "TreeType.add_elements\""""
+
+    __slots__ = ('type', 'parent_uuid', 'uuids', 'pagers')
+
+    def __init__(self, klass, parent_uuid):
+        self.type = klass
+        self.parent_uuid = parent_uuid
+        self.uuids = {}  # Row UUID --> None, in insertion order.
+        self.pagers = []
+
+
+def search_words(row):
+    """Return the words of a row indexed by the search
+
+    The words of the UUID, "name", "external_ids" values, "addresses" and
+    "match" columns, if the row has them.
+    """
+    words = indexes.split_words(str(row.uuid))
+    for column in SEARCH_COLUMNS:
+        value = getattr(row, column, None)
+        if isinstance(value, dict):
+            value = value.values()
+        if isinstance(value, str):
+            words += indexes.split_words(value)
+        elif value:
+            for item in value:
+                words += indexes.split_words(str(item))
+    return words
+
+
+def match_references(match):
+    """Return the keys of the Address_Sets and Port_Groups of a "match\""""
+    match = ovn_match.parse(match)
+    return ([(constants.ADDRESS_SET, name) for name in match.address_sets] +
+            [(constants.PORT_GROUP, name) for name in match.port_groups])
+
+
+def get_registered_tables(schema_name):
+    """Return the union of the tables and columns used by the tree types"""
+    tables = collections.defaultdict(set)
+    for klass in get_tree_types(schema_name):
+        for table, columns in klass.TABLES.items():
+            tables[table].update(columns)
+    return tables
+
 
 class RootTree(object):
+    """OVN elements tree
 
-    # TODO(ralonsoh): add a sync decorator to leaf operations.
-    # --> https://github.com/GrahamDumpleton/wrapt/tree/develop/blog
+    The leaf operations must be called from the Tk main loop only; the IDL
+    events are received through a "NotificationQueue".
+    """
 
-    def __init__(self, treeview):
+    def __init__(self, treeview, lazy=constants.TREE_LAZY_POPULATION):
         self._treeview = treeview
+        self._lazy = lazy
+        # Leafs not opened yet: leaf --> (OVN type, row UUID or None for the
+        # top level type leafs).
+        self._pending = {}
+        # Type leafs (see "TreeType.own_leaf"): parent UUID (None for the top
+        # level) --> {OVN type: leaf}.
+        self._headers = {}
+        # Paged type leafs: type leaf --> Page; and the pager leafs: pager
+        # leaf --> (type leaf, True to insert all the remaining rows).
+        self._pages = {}
+        self._pagers = {}
         self._ovn_nb = None
         self._ovn_sb = None
-        self._db = {}
-        self._tree = {}  # Main parents: LS and PG.
-        self._tree_parents = {}
+        self._db = {}  # Element UUID --> TreeElement.
+        self._tree = {}  # Main parents (LS and PG) UUID --> TreeElement.
+        # NB rows indexes: port name --> QoS rows and Logical_Switch_Port
+        # rows (the QoS "match" refers to the port name, in Neutron the port
+        # ID, not to the row UUID), child ID --> parent rows (LS, LR and PG),
+        # the search words --> rows, the reference keys (see
+        # "TreeType.reference_keys") --> rows referring to them, the "match"
+        # fields --> ACL and QoS rows (see "match.MatchIndex") and the
+        # address prefixes --> Address_Set rows. SB rows indexes: chassis ID
+        # --> Port_Binding rows and logical port --> Port_Binding rows.
+        self._qos_index = indexes.RowIndex(QoSes.match_ports)
+        self._port_name_index = indexes.RowIndex(
+            LogicalSiwtchPorts.port_names)
+        self._parent_index = indexes.RowIndex(self._child_uuids)
+        self._search_index = indexes.SearchIndex(search_words)
+        self._reference_index = indexes.RowIndex(self._references)
+        self._match_index = ovn_match.MatchIndex()
+        self._address_set_index = ovn_match.NetworkIndex(
+            AddressSets.networks)
+        self._chassis_index = indexes.RowIndex(PortBindings.chassis_uuids)
+        self._binding_index = indexes.RowIndex(PortBindings.logical_ports)
+        # Index --> indexed tree types. An index is built on the first lookup
+        # and then updated with the IDL events.
+        self._index_types = {
+            self._qos_index: (QoSes, ),
+            self._port_name_index: (LogicalSiwtchPorts, ),
+            self._parent_index: tuple(
+                klass for klass in get_tree_types(constants.OVN_NORTHBOUND)
+                if klass.CHILD_COLUMN),
+            self._search_index: get_tree_types(constants.OVN_NORTHBOUND),
+            self._reference_index: get_tree_types(constants.OVN_NORTHBOUND),
+            self._match_index: (ACLs, QoSes),
+            self._address_set_index: (AddressSets, ),
+            self._chassis_index: (PortBindings, ),
+            self._binding_index: (PortBindings, )}
+        # OVN table --> indexes of its rows, to route the IDL events.
+        self._table_indexes = collections.defaultdict(list)
+        for index, klasses in self._index_types.items():
+            for klass in klasses:
+                self._table_indexes[klass.TYPE].append(index)
+        self._built_indexes = set()
+        # Indexes being built a chunk at a time --> iterator of the rows not
+        # indexed yet (see "_build_index").
+        self._building_indexes = {}
 
     def update_ovn_connections(self, ovn_nb, ovn_sb):
+        changed = set()
+        if ovn_nb is not self._ovn_nb:
+            changed.add(constants.OVN_NORTHBOUND)
+        if ovn_sb is not self._ovn_sb:
+            changed.add(constants.OVN_SOUTHBOUND)
+        self._built_indexes = set(
+            index for index in self._built_indexes if
+            self._index_types[index][0].SCHEMA not in changed)
+        self._building_indexes = {
+            index: rows for index, rows in self._building_indexes.items() if
+            self._index_types[index][0].SCHEMA not in changed}
         self._ovn_nb = ovn_nb
         self._ovn_sb = ovn_sb
 
+    def get_api(self, schema_name):
+        if schema_name == constants.OVN_SOUTHBOUND:
+            return self._ovn_sb
+        return self._ovn_nb
+
+    def _index_rows(self, index):
+        for klass in self._index_types[index]:
+            rows = self.get_api(klass.SCHEMA).tables[klass.TYPE].rows
+            # The IDL thread changes the rows while the index is built; the
+            # rows are copied in a single call.
+            for row in list(rows.values()):
+                yield rows, row
+
+    def _build_index(self, index, size=None):
+        """Index the next "size" rows (all if None); return True once built
+
+        The IDL events received while an index is being built are applied
+        to it too; the rows deleted meanwhile are skipped.
+        """
+        if index in self._built_indexes:
+            return True
+        rows = self._building_indexes.get(index)
+        if rows is None:
+            index.start_build()
+            rows = self._building_indexes[index] = self._index_rows(index)
+        count = 0
+        for table_rows, row in itertools.islice(rows, size):
+            count += 1
+            if row.uuid in table_rows:
+                index.update(row)
+        if size is not None and count == size:
+            return False
+        index.finish_build()
+        del self._building_indexes[index]
+        self._built_indexes.add(index)
+        return True
+
+    def _get_index(self, index):
+        self._build_index(index)
+        return index
+
+    def build_search_index(self, size=constants.SEARCH_INDEX_CHUNK_SIZE):
+        """Index the next rows of the search index; return True once built
+
+        The search index is the slowest one to build; the viewer builds it a
+        chunk at a time while the UI is idle, not on the first search.
+        """
+        return self._build_index(self._search_index, size=size)
+
+    @property
+    def search_index_built(self):
+        return self._search_index in self._built_indexes
+
+    def _update_indexes(self, event, row):
+        for index in self._table_indexes.get(row._table.name, ()):
+            if (index not in self._built_indexes and
+                    index not in self._building_indexes):
+                continue
+            if event == ovs_event.RowEvent.ROW_DELETE:
+                index.delete(row)
+            else:
+                index.update(row)
+
+    @property
+    def qos_index(self):
+        return self._get_index(self._qos_index)
+
+    @property
+    def port_name_index(self):
+        return self._get_index(self._port_name_index)
+
+    @property
+    def parent_index(self):
+        return self._get_index(self._parent_index)
+
+    @property
+    def chassis_index(self):
+        return self._get_index(self._chassis_index)
+
+    @property
+    def binding_index(self):
+        return self._get_index(self._binding_index)
+
+    def _child_uuids(self, row):
+        column = get_tree_type(row._table.name).CHILD_COLUMN
+        # The referenced UUIDs are read from the IDL row data: the IDL drops
+        # the references to the rows not received yet when a column is read,
+        # e.g.: the scoped child rows, monitored after their parent is
+        # received (see "OvnIdl._update_child_conditions").
+        data = getattr(row, '_data', None)
+        if not data or column not in data:  # E.g.: a snapshot row.
+            return [str(child.uuid) for child in getattr(row, column)]
+        return [str(atom.value) for atom in data[column].values]
+
+    def _references(self, row):
+        return get_tree_type(row._table.name).references(row)
+
+    def search(self, text):
+        """Return the UUIDs of the rows matching a text (see SearchIndex)"""
+        return self._get_index(self._search_index).search(text)
+
+    def where_used(self, item_type, uuid):
+        """Return the UUIDs of the rows referring to an element
+
+        E.g.: the ACLs whose "match" uses an Address_Set or a Port_Group, the
+        Port_Groups of a Logical_Switch_Port or the Logical_Switch_Port of a
+        Logical_Router_Port. The parent element is not included.
+        """
+        klass = get_tree_type(item_type)
+        row = self.get_row(item_type, uuid) if klass else None
+        if not row:
+            return set()
+        index = self._get_index(self._reference_index)
+        uuids = set()
+        for key in klass.reference_keys(rowview.RowView(row)):
+            uuids.update(index.get(key))
+        return uuids
+
+    def _address_sets(self, network):
+        """Return the Address_Set names with addresses overlapping a prefix"""
+        rows = self._ovn_nb.tables[constants.ADDRESS_SET].rows
+        return [rows[uuid].name for uuid in
+                self._get_index(self._address_set_index).search(network)
+                if uuid in rows]
+
+    def find_rules(self, text):
+        """Return the UUIDs of the ACL and QoS rows matching a rules query
+
+        E.g.: "10.0.0.0/24 tcp/22", see "match.MatchIndex.search". The rules
+        using an address set with addresses in a queried prefix match too.
+        """
+        return self._get_index(self._match_index).search(
+            text, address_sets=self._address_sets)
+
+    @instrumentation.timed
     def populate_subtree(self):
-        if not self._ovn_sb or not self._ovn_sb:
-            raise RuntimeError('OVN connections should be provided')
-        ls_tt = LogicalSwitches(self, self._ovn_nb, self._ovn_sb)
-        ls_tt.populate_subtree()
-        pg_tt = PortGroups(self, self._ovn_nb, self._ovn_sb)
-        pg_tt.populate_subtree()
+        """Build the top level types of the databases connected
 
-    def get_leaf(self, item_type, uuid):
+        The types already built are skipped; e.g.: the SB types are added
+        when the SB database is connected after the NB one.
+        """
+        if not self._ovn_nb:
+            raise RuntimeError('OVN NB connection should be provided')
+        for klass in get_tree_types():
+            if (klass.PARENT_TYPE or not self.get_api(klass.SCHEMA) or
+                    self.get_header(None, klass.TYPE)):
+                continue
+            tree_type = klass(self, self._ovn_nb, self._ovn_sb)
+            own_leaf = tree_type.own_leaf  # Even without elements.
+            if self._lazy:
+                self.defer(own_leaf, klass.TYPE, None)
+            else:
+                tree_type.populate_subtree()
+
+    @property
+    def ovn_nb(self):
+        return self._ovn_nb
+
+    @property
+    def lazy(self):
+        return self._lazy
+
+    def walk(self, root_uuid=None, leaf_types=()):
+        """Walk all the elements, depth first, without building the tree
+
+        Yields (depth, tree type, row, parent UUID) tuples. Only the element
+        being visited and its ancestors are kept, thus the memory does not
+        depend on the database size (e.g.: see "export"). With "root_uuid",
+        only an element and its subtree are walked (depth 0 is the element);
+        the children of the "leaf_types" elements are not walked.
+        """
+        if root_uuid:
+            path = self.get_path(root_uuid)
+            if not path or path[0][0].SCHEMA != constants.OVN_NORTHBOUND:
+                return
+            tree_type = path[0][0](
+                self, self._ovn_nb, self._ovn_sb,
+                parent_uuid=path[1][1] if len(path) > 1 else None)
+            yield from self._walk_element(
+                tree_type, rowview.RowView(self.get_row(tree_type.TYPE,
+                                                        root_uuid)),
+                0, leaf_types)
+            return
+        for klass in get_tree_types(constants.OVN_NORTHBOUND):
+            if klass.PARENT_TYPE:
+                continue
+            tree_type = klass(self, self._ovn_nb, self._ovn_sb)
+            for row in list(self._ovn_nb.tables[klass.TYPE].rows.values()):
+                yield from self._walk_element(tree_type, rowview.RowView(row),
+                                              0, leaf_types)
+
+    def _walk_element(self, tree_type, row, depth, leaf_types):
+        yield depth, tree_type, row, tree_type.parent_uuid
+        if not tree_type.CHILD_TYPE or tree_type.TYPE in leaf_types:
+            return
+        uuid = str(row.uuid)
+        child_tt = get_tree_type(tree_type.CHILD_TYPE)(
+            self, self._ovn_nb, self._ovn_sb, parent_uuid=uuid)
+        child_rows = self._ovn_nb.tables[tree_type.CHILD_TYPE].rows
+        for child_uuid in tree_type.child_uuids(row):
+            child = child_rows.get(child_uuid)
+            if child is not None:
+                yield from self._walk_element(
+                    child_tt, rowview.RowView(child), depth + 1, leaf_types)
+
+    def get_parent_uuid(self, uuid):
         try:
-            return self._db[uuid]
+            return self._db[uuid].parent
         except KeyError:
             return
 
-    def add_leaf(self, item_type, uuid, parent_uuid, datum, leaf):
-        self._db[uuid] = (datum, leaf)
-        if item_type == constants.LOGICAL_SWITCH:
-            self._add_leaf_ls(uuid)
-        elif item_type == constants.LOGICAL_SWITCH_PORT:
-            self._add_leaf_lsp(uuid, parent_uuid)
-        elif item_type == constants.QOS:
-            self._add_leaf_qos(uuid, parent_uuid)
-        elif item_type == constants.PORT_GROUP:
-            self._add_leaf_pg(uuid)
-        elif item_type == constants.ACL:
-            self._add_leaf_acl(uuid, parent_uuid)
-
-    def _add_leaf_ls(self, uuid):
-        if uuid in self._tree:
+    def _get_row_type(self, uuid):
+        if uuid in self._db:
+            return get_tree_type(self._db[uuid].type)
+        # Not built: look for the row in each table.
+        row_uuid = uuidlib.UUID(uuid)
+        for klass in get_tree_types():
+            ovn_api = self.get_api(klass.SCHEMA)
+            if ovn_api and row_uuid in ovn_api.tables[klass.TYPE].rows:
+                return klass
+
+    def get_path(self, uuid):
+        """Return the (tree type, UUID) of an element and its ancestors
+
+        The ancestors are read from the database, thus the elements could be
+        not built. Returns None if the element is not in the tree, e.g.: a
+        QoS rule whose port does not exist, or if a UUID is not valid.
+        """
+        path = []
+        try:
+            klass = self._get_row_type(uuid)
+            while klass:
+                row = self.get_row(klass.TYPE, uuid)
+                if row is None:
+                    return
+                path.append((klass, uuid))
+                if not klass.PARENT_TYPE:
+                    return path
+                tree_type = klass(self, self._ovn_nb, self._ovn_sb)
+                uuid = tree_type.find_parent_uuid(rowview.RowView(row))
+                klass = get_tree_type(klass.PARENT_TYPE) if uuid else None
+        except ValueError:
+            return  # Not a UUID.
+
+    def show_element(self, uuid):
+        """Build and open the ancestors of an element; return its leaf
+
+        Returns None if the element is not in the tree (e.g.: a QoS rule
+        whose port does not exist).
+        """
+        path = self.get_path(uuid)
+        if not path:
             return
-        self._tree[uuid] = {}
-        self._tree_parents[uuid] = None
 
-    def _add_leaf_lsp(self, uuid, ls_uuid):
-        if uuid in self._tree[ls_uuid]:
+        # From the top level down, open each type leaf and each ancestor.
+        parent_uuid = None
+        for klass, uuid in reversed(path):
+            if parent_uuid:
+                self.expand_leaf(parent_uuid)
+                self._treeview.item(parent_uuid, open=True)
+            header = self.get_header(parent_uuid, klass.TYPE)
+            if not header:
+                return
+            self.expand_leaf(header)
+            self._treeview.item(header, open=True)
+            if uuid not in self._db and header in self._pages:
+                self._expand_page(header, uuid=uuidlib.UUID(uuid))
+            if uuid not in self._db:
+                return
+            parent_uuid = uuid
+        return uuid
+
+    def get_header(self, parent_uuid, item_type):
+        return self._headers.get(parent_uuid, {}).get(item_type)
+
+    def add_header(self, parent_uuid, item_type, leaf):
+        self._headers.setdefault(parent_uuid, {})[item_type] = leaf
+
+    def _is_populated(self, parent_uuid, item_type):
+        """Return True if the children of a leaf are already built"""
+        if parent_uuid is None:
+            header = self.get_header(None, item_type)
+            return header is not None and header not in self._pending
+        return parent_uuid in self._db and parent_uuid not in self._pending
+
+    def defer(self, leaf, item_type, row_uuid):
+        """Insert a placeholder child; the subtree is built when opened"""
+        self._treeview.insert(leaf, 'end',
+                              text=constants.TREE_PLACEHOLDER_TEXT)
+        self._pending[leaf] = (item_type, row_uuid)
+
+    def paginate(self, tree_type, uuids):
+        """Return the UUIDs of the leafs to insert; page the rest"""
+        header = self.get_header(tree_type.parent_uuid, tree_type.TYPE)
+        page = self._pages.get(header)
+        if page is None:
+            if len(uuids) <= constants.TREE_PAGE_SIZE:
+                return uuids
+            page = Page(type(tree_type), tree_type.parent_uuid)
+            self._pages[tree_type.own_leaf] = page
+            uuids, paged = (uuids[:constants.TREE_PAGE_SIZE],
+                            uuids[constants.TREE_PAGE_SIZE:])
+        else:
+            uuids, paged = [], uuids
+        page.uuids.update(dict.fromkeys(paged))
+        return uuids
+
+    def update_pagers(self, header):
+        """Replace the pager leafs of a type leaf, at the end of it"""
+        page = self._pages.get(header)
+        if page is None:
             return
-        self._tree[ls_uuid][uuid] = {}
-        self._tree_parents[uuid] = ls_uuid
-
-    def _add_leaf_qos(self, uuid, lsp_uuid):
-        ls_uuid = self._tree_parents[lsp_uuid]
-        if uuid in self._tree[ls_uuid][lsp_uuid]:
+        self._delete_pagers(page)
+        if not page.uuids:
+            del self._pages[header]
             return
 
-        self._tree[ls_uuid][lsp_uuid][uuid] = True  # No child leafs.
-        self._tree_parents[uuid] = lsp_uuid
+        count = len(page.uuids)
+        pagers = [(constants.TREE_NEXT_PAGE_TEXT %
+                   (min(count, constants.TREE_PAGE_SIZE), count), False)]
+        if count > constants.TREE_PAGE_SIZE:
+            pagers.append((constants.TREE_SHOW_ALL_TEXT % count, True))
+        for text, show_all in pagers:
+            pager = self._treeview.insert(header, 'end', text=text)
+            self._treeview.insert(pager, 'end',
+                                  text=constants.TREE_PLACEHOLDER_TEXT)
+            self._pagers[pager] = (header, show_all)
+            page.pagers.append(pager)
+
+    def _delete_pagers(self, page):
+        if page.pagers:
+            self._treeview.delete(*page.pagers)
+        for pager in page.pagers:
+            del self._pagers[pager]
+        page.pagers = []
+
+    def _drop_headers(self, parent_uuid):
+        """Forget the type leafs of an element, deleted from the Treeview"""
+        for header in self._headers.pop(parent_uuid, {}).values():
+            page = self._pages.pop(header, None)
+            for pager in page.pagers if page else ():
+                del self._pagers[pager]
+
+    def _expand_page(self, header, show_all=False, uuid=None):
+        """Insert the next page, all the paged rows or a single one"""
+        page = self._pages[header]
+        if uuid:
+            uuids = [uuid] if uuid in page.uuids else []
+        elif show_all:
+            uuids = list(page.uuids)
+        else:
+            uuids = list(itertools.islice(page.uuids,
+                                          constants.TREE_PAGE_SIZE))
+        for _uuid in uuids:
+            del page.uuids[_uuid]
+        tree_type = page.type(self, self._ovn_nb, self._ovn_sb,
+                              parent_uuid=page.parent_uuid, own_leaf=header)
+        tree_type.insert_elements(uuids)
+        self.update_pagers(header)
+
+    @instrumentation.timed
+    def expand_leaf(self, leaf):
+        if leaf in self._pagers:
+            header, show_all = self._pagers[leaf]
+            self._expand_page(header, show_all=show_all)
+            return
 
-    def _add_leaf_pg(self, uuid):
-        if uuid in self._tree:
+        try:
+            item_type, row_uuid = self._pending.pop(leaf)
+        except KeyError:
             return
-        self._tree[uuid] = {}
-        self._tree_parents[uuid] = None
 
-    def _add_leaf_acl(self, uuid, pg_uuid):
-        if uuid in self._tree[pg_uuid]:
+        self._treeview.delete(*self._treeview.get_children(leaf))
+        klass = get_tree_type(item_type)
+        if row_uuid is None:
+            tree_type = klass(self, self._ovn_nb, self._ovn_sb, own_leaf=leaf)
+            tree_type.populate_subtree()
             return
-        self._tree[pg_uuid][uuid] = True  # No child leafs.
-        self._tree_parents[uuid] = pg_uuid
 
-    def delete_leaf(self, row):
-        uuid = str(row.uuid)
+        row = self.get_api(klass.SCHEMA).tables[item_type].rows.get(row_uuid)
+        if row:
+            tree_type = klass(self, self._ovn_nb, self._ovn_sb)
+            tree_type.populate_children(rowview.RowView(row), leaf)
 
-        # Remove from _treeview
-        self._treeview.delete(uuid)
+    def get_leaf(self, item_type, uuid):
+        """Return the leaf of an element (its UUID), if built"""
+        if uuid in self._db:
+            return uuid
 
-        # Delete from _tree
-        parent = uuid
-        branches = []
-        while parent:
-            parent = self._tree_parents[parent]
-            if parent:
-                branches.append(parent)
+    def get_row(self, item_type, uuid):
+        """Return the row of an element, read from the OVN database"""
+        ovn_api = self.get_api(get_tree_type(item_type).SCHEMA)
+        return ovn_api.tables[item_type].rows.get(uuidlib.UUID(uuid))
 
-        element_branch = self._tree
-        branches.reverse()
-        for branch in branches:
-            element_branch = element_branch[branch]
+    def add_leaf(self, item_type, uuid, parent_uuid):
+        if uuid in self._db:
+            return
+        uuid = sys.intern(uuid)
+        if parent_uuid is None:
+            element = self._tree[uuid] = TreeElement(item_type, None)
+        else:
+            parent_uuid = sys.intern(parent_uuid)
+            element = TreeElement(item_type, parent_uuid)
+            parent = self._db[parent_uuid]
+            if parent.children is None:
+                parent.children = set()
+            parent.children.add(uuid)
+        self._db[uuid] = element
+
+    @instrumentation.timed
+    def process_events(self, events):
+        """Apply a batch of coalesced IDL events (see NotificationQueue)
+
+        The deleted rows are removed first. Then each created or updated row
+        is handled in isolation: a new leaf is inserted under its parent or an
+        existing leaf information is refreshed and its children are linked or
+        unlinked. The cost depends on the number of events only.
+        """
+        deleted = []
+        changed = []
+        for event, row in events:
+            self._update_indexes(event, row)
+            if event == ovs_event.RowEvent.ROW_DELETE:
+                deleted.append(row)
+            else:
+                changed.append(rowview.RowView(row))
+
+        self.delete_leaves(deleted)
+        self._apply_changes(changed)
+
+    def _apply_changes(self, rows):
+        for row in rows:
+            if str(row.uuid) in self._db:
+                self._update_leaf(row)
+            else:
+                self._create_leaf(row)
+
+    @instrumentation.timed
+    def reconcile(self, ovn_nb, ovn_sb):
+        """Replace the OVN connections and update the tree to their data
+
+        Used when the tree was built from another source (e.g.: a snapshot)
+        or to discard the queued IDL events. The leafs missing in the new data
+        are deleted and the other rows are handled like the IDL update
+        events; the indexes are built again from the new data.
+        """
+        self.update_ovn_connections(ovn_nb, ovn_sb)
+        self._built_indexes = set()
+        self._building_indexes = {}
+        apis = {constants.OVN_NORTHBOUND: ovn_nb,
+                constants.OVN_SOUTHBOUND: ovn_sb}
+        rows = []
+        for klass in get_tree_types():
+            if apis.get(klass.SCHEMA):
+                table = apis[klass.SCHEMA].tables[klass.TYPE]
+                # Copied, the IDL thread changes the rows (see "_get_index").
+                rows += (rowview.RowView(row) for row in
+                         list(table.rows.values()))
+
+        self._delete_uuids(set(self._db) - set(str(row.uuid) for row in rows))
+        self._apply_changes(rows)
+
+    def _create_leaf(self, row):
+        klass = get_tree_type(row._table.name)
+        parent_uuid = None
+        if klass.PARENT_TYPE:
+            tree_type = klass(self, self._ovn_nb, self._ovn_sb)
+            # A child row can be received after its parent row, with no
+            # parent row update (e.g.: the scoped child rows); look for the
+            # parent in the database then.
+            parent_uuid = (tree_type.get_parent_uuid(row) or
+                           tree_type.find_parent_uuid(row))
+            if not parent_uuid or parent_uuid not in self._db:
+                return  # Built with the parent element.
+        if not self._is_populated(parent_uuid, klass.TYPE):
+            return  # Built from the IDL data when the parent is opened.
+
+        tree_type = klass(self, self._ovn_nb, self._ovn_sb,
+                          parent_leaf=parent_uuid, parent_uuid=parent_uuid)
+        tree_type.add_elements([row.uuid])
+
+    def _update_leaf(self, row):
+        uuid = str(row.uuid)
+        klass = get_tree_type(row._table.name)
+        parent_uuid = self._db[uuid].parent
+        tree_type = klass(self, self._ovn_nb, self._ovn_sb,
+                          parent_leaf=parent_uuid, parent_uuid=parent_uuid)
+        if klass.PARENT_TYPE:
+            if tree_type.get_parent_uuid(row) != parent_uuid:
+                # Re-home the element.
+                self._delete_uuids([uuid])
+                self._create_leaf(row)
+                return
 
-        trimmed_branch = element_branch.pop(uuid)
+        self._treeview.item(uuid, text=tree_type.leaf_text(row))
+        self._update_children(tree_type, row)
 
-        # Delete from _tree_parents and _db
-        self._tree_parents.pop(uuid)
-        self._db.pop(uuid)
+    def _update_children(self, tree_type, row):
+        """Link the new child rows and unlink the removed ones"""
+        uuid = str(row.uuid)
+        if not tree_type.CHILD_TYPE or uuid in self._pending:
+            return
 
-        def remove_from_tree_parents(trimmed_branch):
-            if not isinstance(trimmed_branch, dict):
-                return
-            for key, value in trimmed_branch.items():
-                self._tree_parents.pop(key)
-                self._db.pop(key)
-                remove_from_tree_parents(value)
+        child_uuids = {str(child_uuid): child_uuid for child_uuid in
+                       tree_type.child_uuids(row)}
+        branch = self._get_branch(uuid)
+        self._delete_uuids([child for child in branch if
+                            child not in child_uuids])
+        page = self._pages.get(self.get_header(uuid, tree_type.CHILD_TYPE))
+        if page:
+            for child_uuid in [child_uuid for child_uuid in page.uuids if
+                               str(child_uuid) not in child_uuids]:
+                del page.uuids[child_uuid]
+
+        child_rows = tree_type.ovn_api.tables[tree_type.CHILD_TYPE].rows
+        new_uuids = [child_uuid for child, child_uuid in child_uuids.items()
+                     if child not in branch and child_uuid in child_rows]
+        if new_uuids or page:
+            child_tt = get_tree_type(tree_type.CHILD_TYPE)(
+                self, self._ovn_nb, self._ovn_sb, parent_leaf=uuid,
+                parent_uuid=uuid)
+            child_tt.add_elements(new_uuids)
 
-        remove_from_tree_parents(trimmed_branch)
+    def delete_leaf(self, row):
+        self.delete_leaves([row])
+
+    def delete_leaves(self, rows):
+        self._delete_uuids([str(row.uuid) for row in rows])
+
+    def _delete_uuids(self, uuids):
+        # Skip the leafs not built; not "intersection_update(self._db)",
+        # that iterates the whole tree when a UUID is missing.
+        uuids = {uuid for uuid in uuids if uuid in self._db}
+        # A single Treeview operation; the descendants are deleted with their
+        # ancestor leaf, thus skip them.
+        leaves = [uuid for uuid in uuids if
+                  not self._has_ancestor_in(uuid, uuids)]
+        if not leaves:
+            return
+
+        parents = set(self._db[uuid].parent for uuid in leaves)
+        self._treeview.delete(*leaves)
+        for uuid in leaves:
+            self._remove_branch(uuid)
+
+        # Remove the type leafs left without children.
+        headers = []
+        for parent_uuid in parents:
+            if (parent_uuid in self._db and
+                    not self._get_branch(parent_uuid) and
+                    not any(header in self._pages for header in
+                            self._headers.get(parent_uuid, {}).values())):
+                headers += self._headers.pop(parent_uuid, {}).values()
+        if headers:
+            self._treeview.delete(*headers)
+
+    def _has_ancestor_in(self, uuid, uuids):
+        parent = self._db[uuid].parent
+        while parent:
+            if parent in uuids:
+                return True
+            parent = self._db[parent].parent
+        return False
+
+    def _get_branch(self, uuid):
+        """Return the UUIDs of the children of an element"""
+        return self._db[uuid].children or set()
+
+    def _remove_branch(self, uuid):
+        parent_uuid = self._db[uuid].parent
+        if parent_uuid:
+            self._db[parent_uuid].children.discard(uuid)
+        else:
+            del self._tree[uuid]
+
+        def remove_element(uuid):
+            element = self._db.pop(uuid)
+            self._pending.pop(uuid, None)
+            self._drop_headers(uuid)
+            for child in element.children or ():
+                remove_element(child)
+
+        remove_element(uuid)
 
     @property
     def treeview(self):
         return self._treeview
 
     def print_on_text_box(self, text_box, item_type, uuid):
-        try:
-            info, _ = self._db[item_type][uuid]
-        except KeyError:
+        klass = get_tree_type(item_type)
+        if not klass or uuid not in self._db:
             return
-
-        for klass in (k for k in TreeType.__subclasses__() if
-                      k.TYPE == item_type):
-            klass.print_info(text_box, info)
-
-
+        row = self.get_row(item_type, uuid)
+        if row:
+            tree_type = klass(self, self._ovn_nb, self._ovn_sb)
+            klass.print_info(text_box,
+                             tree_type.get_datum(rowview.RowView(row)))
+
+    def get_linked_uuid(self, item_type, uuid):
+        """Return the element related to another one, see "linked_uuid\""""
+        klass = get_tree_type(item_type)
+        row = self.get_row(item_type, uuid) if klass else None
+        if row:
+            tree_type = klass(self, self._ovn_nb, self._ovn_sb)
+            return tree_type.linked_uuid(rowview.RowView(row))
+
+
+@register_tree_type
 class LogicalSwitches(TreeType):
 
     TYPE = constants.LOGICAL_SWITCH
+    CHILD_TYPE = constants.LOGICAL_SWITCH_PORT
+    CHILD_COLUMN = 'ports'
+    TABLES = {TYPE: ('name', 'other_config', 'external_ids', 'ports')}
 
+    @instrumentation.timed
     def populate_subtree(self, uuids=None):
-        for ls in self._ovn_nb.tables[self.TYPE].rows.values():
-            ls_row = rowview.RowView(ls)
-            uuid = str(ls_row.uuid)
-            text = uuid
-            network_name = ls._data['external_ids'].get('neutron:network_name')
-            if network_name:
-                text += ' (network: %s)' % network_name
-            child_leaf = self._treeview.insert(
-                self.own_leaf, 'end', uuid, text=text, tags=self.TYPE,
-                values=str(ls_row.uuid))
-            self.store_info(ls_row, child_leaf)
-            lsp_tt = LogicalSiwtchPorts(self._root_tree, self._ovn_nb,
-                                        self._ovn_sb, parent_leaf=child_leaf,
-                                        parent_uuid=uuid)
-            lsp_tt.populate_subtree(uuids=[port.uuid for port in ls_row.ports])
+        self.add_elements(self._ovn_nb.tables[self.TYPE].rows)
+
+    def leaf_text(self, row):
+        text = str(row.uuid)
+        network_name = row.external_ids.get('neutron:network_name')
+        if network_name:
+            text += ' (network: %s)' % network_name
+        return text
+
+    def child_uuids(self, row):
+        return [port.uuid for port in row.ports]
+
+    def populate_children(self, row, leaf):
+        lsp_tt = LogicalSiwtchPorts(self._root_tree, self._ovn_nb,
+                                    self._ovn_sb, parent_leaf=leaf,
+                                    parent_uuid=str(row.uuid))
+        lsp_tt.populate_subtree(uuids=self.child_uuids(row))
 
     @staticmethod
     def print_info(text_box, datum):
@@ -220,31 +1010,58 @@ class LogicalSwitches(TreeType):
             {'name': datum['name'], 'other_config': datum['other_config'],
              'external_ids': datum['external_ids']})
 
-    def store_info(self, row, child_leaf):
-        key = str(row.uuid)
-        datum = {
+    def get_datum(self, row):
+        return {
             'name': row.name, 'other_config': row.other_config,
             'external_ids': row.external_ids}
-        self._root_tree.add_leaf(self.TYPE, key, None, datum, child_leaf)
-        return key
 
 
+@register_tree_type
 class LogicalSiwtchPorts(TreeType):
 
     TYPE = constants.LOGICAL_SWITCH_PORT
-
+    PARENT_TYPE = constants.LOGICAL_SWITCH
+    CHILD_TYPE = constants.QOS
+    # "ha_chassis_group" references a row of the HA_Chassis_Group table.
+    TABLES = {TYPE: ('name', 'external_ids', 'addresses', 'ha_chassis_group',
+                     'type', 'options'),
+              constants.HA_CHASSIS_GROUP: ('name', )}
+
+    @instrumentation.timed
     def populate_subtree(self, uuids=None):
-        for port_uuid in uuids:
-            port = self._ovn_nb.tables[self.TYPE].rows.get(port_uuid)
-            port_row = rowview.RowView(port)
-            uuid = str(port_row.uuid)
-            child_leaf = self._treeview.insert(
-                self.own_leaf, 'end', uuid, text=uuid, tags=self.TYPE,
-                values=uuid)
-            self.store_info(port_row, child_leaf)
-            qos_tt = QoSes(self._root_tree, self._ovn_nb, self._ovn_sb,
-                           parent_leaf=child_leaf, parent_uuid=uuid)
-            qos_tt.populate_subtree()
+        self.add_elements(uuids)
+
+    def child_uuids(self, row):
+        return self._root_tree.qos_index.get(row.name)
+
+    def populate_children(self, row, leaf):
+        qos_tt = QoSes(self._root_tree, self._ovn_nb, self._ovn_sb,
+                       parent_leaf=leaf, parent_uuid=str(row.uuid))
+        qos_tt.populate_subtree(uuids=self.child_uuids(row))
+
+    @staticmethod
+    def port_names(row):
+        return (row.name, )
+
+    def get_port_binding(self, row):
+        """Return the SB Port_Binding row of a port, if any"""
+        if not self._ovn_sb:
+            return
+        bindings = self._ovn_sb.tables[constants.PORT_BINDING].rows
+        for binding_uuid in self._root_tree.binding_index.get(row.name):
+            return bindings.get(binding_uuid)
+
+    def linked_uuid(self, row):
+        binding = self.get_port_binding(row)
+        return str(binding.uuid) if binding else None
+
+    @staticmethod
+    def references(row):
+        """The router port of a "router" type port"""
+        router_port = row.options.get('router-port')
+        if router_port:
+            return ((constants.LOGICAL_ROUTER_PORT, router_port), )
+        return ()
 
     @staticmethod
     def print_info(text_box, datum):
@@ -252,50 +1069,68 @@ class LogicalSiwtchPorts(TreeType):
             'id: %(id)s  --  name: %(name)s\n'
             'device_id: %(device_id)s  -- type: %(type)s\n'
             'addresses: %(addresses)s  -- cidrs: %(cidrs)s\n'
-            'ha_chassis_group: %(ha_chassis_group)s' %
+            'ha_chassis_group: %(ha_chassis_group)s\n'
+            'port_binding: %(port_binding)s  --  chassis: %(chassis)s' %
             {'id': datum['name'], 'device_id': datum['device_id'],
              'name': datum['name'], 'addresses': datum['addresses'],
              'cidrs': datum['cidrs'], 'type': datum['type'],
-             'ha_chassis_group': datum['ha_chassis_group']})
-
-    def store_info(self, row, leaf):
-        key = str(row.uuid)
-        datum = {
+             'ha_chassis_group': datum['ha_chassis_group'],
+             'port_binding': datum['port_binding'],
+             'chassis': datum['chassis']})
+
+    def get_datum(self, row):
+        binding = self.get_port_binding(row)
+        chassis = binding.chassis if binding else None
+        return {
             'device_id': row.external_ids.get('neutron:device_id'),
             'name': row.external_ids.get('neutron:port_name'),
             'addresses': row.addresses, 'id': row.name,
             'cidrs': row.external_ids.get('neutron:cidrs'),
             'ha_chassis_group': row.ha_chassis_group,
-            'type': row.type}
-        self._root_tree.add_leaf(self.TYPE, key, self._parent_uuid, datum,
-                                 leaf)
-        return key
+            'type': row.type,
+            'port_binding': str(binding.uuid) if binding else None,
+            'chassis': chassis[0].name if chassis else None}
 
 
+@register_tree_type
 class QoSes(TreeType):
 
     TYPE = constants.QOS
-    REGEX_ID = re.compile(r'(inport|outport) == '
-                          r'[\"\'](?P<id>[0-9a-fA-F\-]+)[\"\']')
+    PARENT_TYPE = constants.LOGICAL_SWITCH_PORT
+    TABLES = {TYPE: ('action', 'match', 'bandwidth', 'priority', 'direction',
+                     'external_ids')}
 
+    @instrumentation.timed
     def populate_subtree(self, uuids=None):
-        for qos_row in self.extid_qos_map(self._parent_uuid):
-            text = str(qos_row.uuid)
-            child_leaf = self._treeview.insert(
-                self.own_leaf, 'end', text, text=text, tags=self.TYPE,
-                values=text)
-            self.store_info(qos_row, child_leaf)
-
-    def extid_qos_map(self, port_uuid):
-        for qos in self._ovn_nb.tables[self.TYPE].rows.values():
-            # TODO(ralonsoh): in "external_ids", add the FIP ID or the port
-            #                 ID; that will speed up the search without
-            #                 using regex.
-            qos_row = rowview.RowView(qos)
-            match = self.REGEX_ID.search(qos_row.match)
-            if match:
-                if port_uuid == match.group('id'):
-                    yield rowview.RowView(qos)
+        # The index could lag the IDL, the rows missing are skipped.
+        self.insert_elements(uuids)
+
+    def get_parent_uuid(self, row):
+        """Return the UUID of the Logical_Switch_Port named in the "match\""""
+        for port_name in self.match_ports(row):
+            for port_uuid in self._root_tree.port_name_index.get(port_name):
+                return str(port_uuid)
+
+    def find_parent_uuid(self, row):
+        return self.get_parent_uuid(row)
+
+    def extid_qos_map(self, port_name):
+        qos_rows = self._ovn_nb.tables[self.TYPE].rows
+        for qos_uuid in self._root_tree.qos_index.get(port_name):
+            row = qos_rows.get(qos_uuid)
+            if row is not None:
+                yield rowview.RowView(row)
+
+    @staticmethod
+    def references(row):
+        return match_references(row.match)
+
+    @staticmethod
+    def match_ports(row):
+        """Return the port name referenced in the QoS "match", if any"""
+        # TODO(ralonsoh): in "external_ids", add the FIP ID or the port ID;
+        #                 that will avoid parsing the "match" string.
+        return ovn_match.parse(row.match).ports[:1]
 
     @staticmethod
     def print_info(text_box, datum):
@@ -307,37 +1142,46 @@ class QoSes(TreeType):
              'bandwidth': datum['bandwidth'], 'direction': datum['direction'],
              'match': datum['match']})
 
-    def store_info(self, row, leaf):
-        key = str(row.uuid)
-        datum = {
-            'uuid': key, 'action': row.action, 'match': row.match,
+    def get_datum(self, row):
+        return {
+            'uuid': str(row.uuid), 'action': row.action, 'match': row.match,
             'bandwidth': row.bandwidth, 'priority': row.priority,
             'direction': row.direction, 'external_ids': row.external_ids}
-        self._root_tree.add_leaf(self.TYPE, key, self._parent_uuid, datum,
-                                 leaf)
-        return key
 
 
+@register_tree_type
 class PortGroups(TreeType):
 
     TYPE = constants.PORT_GROUP
+    CHILD_TYPE = constants.ACL
+    CHILD_COLUMN = 'acls'
+    TABLES = {TYPE: ('name', 'external_ids', 'acls', 'ports')}
 
+    @instrumentation.timed
     def populate_subtree(self, uuids=None):
-        for pg in self._ovn_nb.tables[self.TYPE].rows.values():
-            pg_row = rowview.RowView(pg)
-            uuid = str(pg_row.uuid)
-            text = uuid
-            sg = pg._data['external_ids'].get('neutron:security_group_id')
-            if sg:
-                text += ' (Neutron SG: %s)' % sg
-            child_leaf = self._treeview.insert(
-                self.own_leaf, 'end', uuid, text=text, tags=self.TYPE,
-                values=uuid)
-            self.store_info(pg_row, child_leaf)
-            acl_tt = ACLs(
-                self._root_tree, self._ovn_nb, self._ovn_sb,
-                parent_leaf=child_leaf, parent_uuid=uuid)
-            acl_tt.populate_subtree(uuids=[acls.uuid for acls in pg_row.acls])
+        self.add_elements(self._ovn_nb.tables[self.TYPE].rows)
+
+    def leaf_text(self, row):
+        text = str(row.uuid)
+        sg = row.external_ids.get('neutron:security_group_id')
+        if sg:
+            text += ' (Neutron SG: %s)' % sg
+        return text
+
+    def child_uuids(self, row):
+        return [acls.uuid for acls in row.acls]
+
+    @staticmethod
+    def references(row):
+        """The member Logical_Switch_Ports"""
+        return [(constants.LOGICAL_SWITCH_PORT, str(port.uuid))
+                for port in row.ports]
+
+    def populate_children(self, row, leaf):
+        acl_tt = ACLs(
+            self._root_tree, self._ovn_nb, self._ovn_sb,
+            parent_leaf=leaf, parent_uuid=str(row.uuid))
+        acl_tt.populate_subtree(uuids=self.child_uuids(row))
 
     @staticmethod
     def print_info(text_box, datum):
@@ -346,27 +1190,26 @@ class PortGroups(TreeType):
             'external_ids: %(external_ids)s' %
             {'name': datum['name'], 'external_ids': datum['external_ids']})
 
-    def store_info(self, row, leaf):
-        key = str(row.uuid)
-        datum = {'name': row.name,
-                 'external_ids': row.external_ids}
-        self._root_tree.add_leaf(self.TYPE, key, None, datum, leaf)
-        return key
+    def get_datum(self, row):
+        return {'name': row.name,
+                'external_ids': row.external_ids}
 
 
+@register_tree_type
 class ACLs(TreeType):
 
     TYPE = constants.ACL
+    PARENT_TYPE = constants.PORT_GROUP
+    TABLES = {TYPE: ('name', 'priority', 'direction', 'external_ids', 'meter',
+                     'match', 'action', 'severity')}
 
+    @instrumentation.timed
     def populate_subtree(self, parent_leaf=None, uuids=None):
-        for uuid in uuids:
-            acl = self._ovn_nb.tables[self.TYPE].rows.get(uuid)
-            acl_row = rowview.RowView(acl)
-            uuid = str(acl_row.uuid)
-            child_leaf = self._treeview.insert(
-                self.own_leaf, 'end', uuid, text=uuid, tags=self.TYPE,
-                values=uuid)
-            self.store_info(acl_row, child_leaf)
+        self.add_elements(uuids)
+
+    @staticmethod
+    def references(row):
+        return match_references(row.match)
 
     @staticmethod
     def print_info(text_box, datum):
@@ -379,13 +1222,205 @@ class ACLs(TreeType):
              'meter': datum['meter'], 'direction': datum['direction'],
              'match': datum['match'], 'severity': datum['severity']})
 
-    def store_info(self, row, leaf):
-        key = str(row.uuid)
-        datum = {
+    def get_datum(self, row):
+        return {
             'name': row.name, 'priority': row.priority,
             'direction': row.direction, 'external_ids': row.external_ids,
             'meter': row.meter, 'match': row.match, 'action': row.action,
             'severity': row.severity}
-        self._root_tree.add_leaf(self.TYPE, key, self._parent_uuid, datum,
-                                 leaf)
-        return key
+
+
+@register_tree_type
+class LogicalRouters(TreeType):
+
+    TYPE = constants.LOGICAL_ROUTER
+    CHILD_TYPE = constants.LOGICAL_ROUTER_PORT
+    CHILD_COLUMN = 'ports'
+    TABLES = {TYPE: ('name', 'options', 'external_ids', 'ports')}
+
+    @instrumentation.timed
+    def populate_subtree(self, uuids=None):
+        self.add_elements(self._ovn_nb.tables[self.TYPE].rows)
+
+    def leaf_text(self, row):
+        text = str(row.uuid)
+        router_name = row.external_ids.get('neutron:router_name')
+        if router_name:
+            text += ' (router: %s)' % router_name
+        return text
+
+    def child_uuids(self, row):
+        return [port.uuid for port in row.ports]
+
+    def populate_children(self, row, leaf):
+        lrp_tt = LogicalRouterPorts(self._root_tree, self._ovn_nb,
+                                    self._ovn_sb, parent_leaf=leaf,
+                                    parent_uuid=str(row.uuid))
+        lrp_tt.populate_subtree(uuids=self.child_uuids(row))
+
+    @staticmethod
+    def print_info(text_box, datum):
+        text_box.set(
+            'name: %(name)s\n'
+            'options: %(options)s\n'
+            'external_ids: %(external_ids)s' %
+            {'name': datum['name'], 'options': datum['options'],
+             'external_ids': datum['external_ids']})
+
+    def get_datum(self, row):
+        return {'name': row.name, 'options': row.options,
+                'external_ids': row.external_ids}
+
+
+@register_tree_type
+class LogicalRouterPorts(TreeType):
+
+    TYPE = constants.LOGICAL_ROUTER_PORT
+    PARENT_TYPE = constants.LOGICAL_ROUTER
+    TABLES = {TYPE: ('name', 'mac', 'networks', 'peer', 'external_ids')}
+
+    @instrumentation.timed
+    def populate_subtree(self, uuids=None):
+        self.add_elements(uuids)
+
+    def leaf_text(self, row):
+        return '%s (%s)' % (row.uuid, ', '.join(row.networks))
+
+    @staticmethod
+    def references(row):
+        """The peer router port, if any"""
+        return [(constants.LOGICAL_ROUTER_PORT, peer) for peer in row.peer]
+
+    @staticmethod
+    def print_info(text_box, datum):
+        text_box.set(
+            'name: %(name)s  --  mac: %(mac)s\n'
+            'networks: %(networks)s  --  peer: %(peer)s\n'
+            'external_ids: %(external_ids)s' %
+            {'name': datum['name'], 'mac': datum['mac'],
+             'networks': datum['networks'], 'peer': datum['peer'],
+             'external_ids': datum['external_ids']})
+
+    def get_datum(self, row):
+        return {'name': row.name, 'mac': row.mac, 'networks': row.networks,
+                'peer': row.peer, 'external_ids': row.external_ids}
+
+
+@register_tree_type
+class AddressSets(TreeType):
+
+    TYPE = constants.ADDRESS_SET
+    TABLES = {TYPE: ('name', 'addresses', 'external_ids')}
+
+    @instrumentation.timed
+    def populate_subtree(self, uuids=None):
+        self.add_elements(self._ovn_nb.tables[self.TYPE].rows)
+
+    def leaf_text(self, row):
+        return '%s (%s)' % (row.uuid, row.name)
+
+    @staticmethod
+    def networks(row):
+        """Return the addresses as ip_networks, skipping the MACs"""
+        return [network for network in map(ovn_match.parse_network,
+                                           row.addresses) if network]
+
+    @staticmethod
+    def print_info(text_box, datum):
+        text_box.set(
+            'name: %(name)s\n'
+            'addresses (%(count)d): %(addresses)s\n'
+            'external_ids: %(external_ids)s' %
+            {'name': datum['name'], 'count': len(datum['addresses']),
+             'addresses': datum['addresses'],
+             'external_ids': datum['external_ids']})
+
+    def get_datum(self, row):
+        return {'name': row.name, 'addresses': row.addresses,
+                'external_ids': row.external_ids}
+
+
+@register_tree_type
+class Chassis(TreeType):
+
+    TYPE = constants.CHASSIS
+    CHILD_TYPE = constants.PORT_BINDING
+    SCHEMA = constants.OVN_SOUTHBOUND
+    TABLES = {TYPE: ('name', 'hostname', 'external_ids')}
+
+    @instrumentation.timed
+    def populate_subtree(self, uuids=None):
+        self.add_elements(self._ovn_sb.tables[self.TYPE].rows)
+
+    def leaf_text(self, row):
+        return '%s (%s)' % (row.uuid, row.hostname or row.name)
+
+    def child_uuids(self, row):
+        return self._root_tree.chassis_index.get(str(row.uuid))
+
+    def populate_children(self, row, leaf):
+        binding_tt = PortBindings(
+            self._root_tree, self._ovn_nb, self._ovn_sb, parent_leaf=leaf,
+            parent_uuid=str(row.uuid))
+        binding_tt.populate_subtree(uuids=self.child_uuids(row))
+
+    @staticmethod
+    def print_info(text_box, datum):
+        text_box.set(
+            'name: %(name)s\n'
+            'hostname: %(hostname)s\n'
+            'external_ids: %(external_ids)s' %
+            {'name': datum['name'], 'hostname': datum['hostname'],
+             'external_ids': datum['external_ids']})
+
+    def get_datum(self, row):
+        return {'name': row.name, 'hostname': row.hostname,
+                'external_ids': row.external_ids}
+
+
+@register_tree_type
+class PortBindings(TreeType):
+
+    TYPE = constants.PORT_BINDING
+    PARENT_TYPE = constants.CHASSIS
+    SCHEMA = constants.OVN_SOUTHBOUND
+    TABLES = {TYPE: ('logical_port', 'chassis', 'type', 'mac', 'tunnel_key')}
+
+    @instrumentation.timed
+    def populate_subtree(self, uuids=None):
+        self.add_elements(uuids)
+
+    def leaf_text(self, row):
+        return '%s (port: %s)' % (row.uuid, row.logical_port)
+
+    def get_parent_uuid(self, row):
+        for chassis_uuid in self.chassis_uuids(row):
+            return chassis_uuid
+
+    def find_parent_uuid(self, row):
+        return self.get_parent_uuid(row)
+
+    @staticmethod
+    def chassis_uuids(row):
+        """Return the ID of the chassis where the port is bound, if any"""
+        return tuple(str(chassis.uuid) for chassis in row.chassis)
+
+    @staticmethod
+    def logical_ports(row):
+        return (row.logical_port, )
+
+    @staticmethod
+    def print_info(text_box, datum):
+        text_box.set(
+            'logical_port: %(logical_port)s  --  type: %(type)s\n'
+            'mac: %(mac)s  --  tunnel_key: %(tunnel_key)s\n'
+            'chassis: %(chassis)s' %
+            {'logical_port': datum['logical_port'], 'type': datum['type'],
+             'mac': datum['mac'], 'tunnel_key': datum['tunnel_key'],
+             'chassis': datum['chassis']})
+
+    def get_datum(self, row):
+        return {
+            'logical_port': row.logical_port, 'type': row.type,
+            'mac': row.mac, 'tunnel_key': row.tunnel_key,
+            'chassis': ', '.join(chassis.name for chassis in row.chassis)}
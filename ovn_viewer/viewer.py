@@ -2,19 +2,224 @@
 
 from ovs import ovsuuid
 import tkinter
+from tkinter import filedialog
 from tkinter import font
+from tkinter import simpledialog
 from tkinter import ttk
 
+from ovn_viewer import cli
 from ovn_viewer import connection
 from ovn_viewer import constants
+from ovn_viewer import diff
+from ovn_viewer import graph
+from ovn_viewer import instrumentation
+from ovn_viewer import notifications
+from ovn_viewer import snapshot
 from ovn_viewer import treetypes
 
 
+def _close_future_api(future):
+    if not future.cancelled() and not future.exception():
+        connection.close_ovn_api(future.result())
+
+
+class ClusterView(object):
+    """Tree of a cluster, shown in a workspace tab
+
+    Owns the cluster connections, its IDL notifications queue and its
+    RootTree. The connections are established by the workspace
+    ConnectionPool and polled from the Tk main loop: a cluster being
+    synchronized does not block the UI nor the other clusters.
+    """
+
+    def __init__(self, viewer, treeview, cluster=None, scope=None,
+                 offline_db=None, offline_name=None):
+        self.viewer = viewer
+        self.treeview = treeview
+        self.cluster = cluster
+        self.name = cluster.name if cluster else offline_name
+        self.scope = scope or connection.MonitorScope()
+        self.root_tree = treetypes.RootTree(
+            instrumentation.TreeviewRecorder(treeview))
+        self.notifications = notifications.NotificationQueue()
+        self.tree_built = False
+        self.ovn_nb = None
+        self.ovn_sb = None
+        # Offline mode: a snapshot or a database file, without connections.
+        self._offline_db = offline_db
+        self._nb_future = None
+        self._sb_future = None
+        self._closed = False
+        self._indexing = False
+
+    def set_status(self, text):
+        self.viewer.set_status(self, text)
+
+    def start(self, pool):
+        if self._offline_db:
+            self._init_tree(self._offline_db, None)
+            self.set_status('%s (offline)' % self.name)
+            return
+
+        # The tab is shown while connecting; the NB tree is built as soon as
+        # the NB database is synchronized (see _wait_for_connections). In the
+        # meantime, the snapshot saved in the last run is shown.
+        cache = snapshot.load_cache(self.name)
+        if cache:
+            self._init_tree(cache, None)
+        self.set_status('%sConnecting to %s and %s...' %
+                        ('Showing the last snapshot. ' if cache else '',
+                         self.cluster.nb_connection,
+                         self.cluster.sb_connection))
+        self._nb_future, self._sb_future = pool.connect(
+            self.cluster, self.notifications, scope=self.scope)
+        self.viewer.after(constants.CONNECTION_POLL_INTERVAL,
+                          self._wait_for_connections)
+
+    def close(self):
+        """Stop the connections, including the ones not established yet"""
+        self._closed = True
+        for future in (self._nb_future, self._sb_future):
+            if future and not future.cancel():
+                future.add_done_callback(_close_future_api)
+        connection.close_ovn_api(self.ovn_nb)
+        connection.close_ovn_api(self.ovn_sb)
+
+    def _wait_for_connections(self):
+        if self._closed:
+            return
+        if self._sb_future and self._sb_future.done():
+            future, self._sb_future = self._sb_future, None
+            try:
+                self.ovn_sb = future.result()
+            except Exception as exc:
+                self.set_status('OVN SB connection failed: %s' % exc)
+            if self.ovn_nb:
+                self.root_tree.update_ovn_connections(self.ovn_nb,
+                                                      self.ovn_sb)
+                self.root_tree.populate_subtree()  # The SB types.
+
+        if self._nb_future and self._nb_future.done():
+            future, self._nb_future = self._nb_future, None
+            try:
+                self.ovn_nb = future.result()
+            except Exception as exc:
+                self.set_status('OVN NB connection failed: %s' % exc)
+            else:
+                self._init_live_tree()
+
+        if self._nb_future or self._sb_future:
+            self.viewer.after(constants.CONNECTION_POLL_INTERVAL,
+                              self._wait_for_connections)
+
+    def _init_tree(self, ovn_nb, ovn_sb):
+        self.root_tree.update_ovn_connections(ovn_nb, ovn_sb)
+        self.root_tree.populate_subtree()
+        self.tree_built = True
+        self._start_indexing()
+
+    def _start_indexing(self):
+        """Build the search index in the background, see "_build_index\""""
+        if not self._indexing:
+            self._indexing = True
+            self.viewer.after_idle(self._build_index)
+
+    def _build_index(self):
+        """Index a chunk of rows per idle callback, until the index is built
+
+        The Tk events are processed between the chunks, thus the UI is not
+        blocked; a search before the index is built completes it.
+        """
+        if self._closed:
+            return
+        if self.root_tree.build_search_index():
+            self._indexing = False
+        else:
+            self.viewer.after_idle(self._build_index)
+
+    def _init_live_tree(self):
+        # The tree is built from the current IDL data, that already includes
+        # the events received during the initial synchronization.
+        self.notifications.drain()
+        if self.tree_built:
+            # Built from the snapshot cache.
+            self.root_tree.reconcile(self.ovn_nb, self.ovn_sb)
+            self.root_tree.populate_subtree()  # The SB types.
+            self._start_indexing()
+        else:
+            self._init_tree(self.ovn_nb, self.ovn_sb)
+        self.set_status('(no item selected)')
+        self.viewer.after(self.viewer.refresh_interval,
+                          self._process_notifications)
+
+    def _process_notifications(self):
+        """Apply a batch of the queued IDL events, once per interval
+
+        While the auto-refresh is paused, the events are only coalesced in
+        the queue: a row changing many times is applied once, thus the work
+        does not grow with the event rate.
+        """
+        if self._closed:
+            return
+        if self.viewer.auto_refresh:
+            events = self.notifications.drain(
+                limit=constants.NOTIFICATION_BATCH_SIZE)
+            if events:
+                self.root_tree.process_events(events)
+                self._rendered()
+        self.viewer.after(self.viewer.refresh_interval,
+                          self._process_notifications)
+
+    def _rendered(self):
+        if instrumentation.enabled():
+            self.viewer.update_idletasks()  # Render the changes.
+            instrumentation.RECORDER.rendered()
+
+    def refresh(self):
+        """Update the tree to the IDL data, discarding the queued events"""
+        if not self.ovn_nb:
+            return
+        self.notifications.drain()
+        self.root_tree.reconcile(self.ovn_nb, self.ovn_sb)
+        self.root_tree.populate_subtree()
+        self._start_indexing()
+        self._rendered()
+
+    def set_scope(self, scope):
+        self.scope = scope
+        if self.ovn_nb:
+            connection.set_monitor_scope(self.ovn_nb, scope)
+
+    def save_cache(self):
+        if not self.cluster or not self.ovn_nb:
+            return
+        try:
+            snapshot.save(self.ovn_nb, snapshot.get_cache_path(self.name))
+        except OSError:
+            pass  # The cache is optional.
+
+
 class OvnViewer(tkinter.Frame):
 
-    def __init__(self, master_window):
+    def __init__(self, master_window, clusters=None, scope=None,
+                 offline_db=None, offline_name=None, diagnostics_log=None,
+                 refresh_interval=constants.NOTIFICATION_INTERVAL):
         super(OvnViewer, self).__init__(master=master_window)
-        self.root_tree = None
+        # The IDL events are applied at most once per interval (ms).
+        self.refresh_interval = refresh_interval
+        self._auto_refresh = True
+        self._refresh_menu = None
+        # Stream where the instrumentation stats are written periodically.
+        self._diagnostics_log = diagnostics_log
+        self._diagnostics_enabled = None
+        # Offline mode: a snapshot or a database file, without connections.
+        self._offline_db = offline_db
+        self._offline_name = offline_name
+        self._clusters = clusters or [connection.Cluster()]
+        self._scope = scope
+        self._pool = None
+        self.notebook = None
+        self._views = {}  # Tab --> ClusterView.
         self._configure_monspace_font()
 
     def _configure_monspace_font(self):
@@ -29,21 +234,67 @@ class OvnViewer(tkinter.Frame):
         self.master.config(menu=menubar)
 
         file_menu = tkinter.Menu(master=menubar)
+        file_menu.add_command(label='Save snapshot...',
+                              command=self._menu_save_snapshot)
+        file_menu.add_command(label='Compare with a snapshot...',
+                              command=self._menu_compare_snapshot)
+        file_menu.add_command(label='Export topology graph...',
+                              command=self._menu_export_graph)
+        file_menu.add_separator()
         file_menu.add_command(label='Exit', command=self._menu_exit)
         menubar.add_cascade(label='File', menu=file_menu)
 
+        cluster_menu = tkinter.Menu(master=menubar)
+        cluster_menu.add_command(label='Open cluster...',
+                                 command=self._menu_open_cluster)
+        cluster_menu.add_command(label='Close the current cluster',
+                                 command=self._menu_close_cluster)
+        menubar.add_cascade(label='Clusters', menu=cluster_menu)
+
         refresh_menu = tkinter.Menu(master=menubar)
         refresh_menu.add_command(label='Force single refresh',
                                  command=self._menu_single_refresh)
         refresh_menu.add_separator()
         refresh_menu.add_command(label='Enable auto-refresh',
-                                 command=self._menu_enable_refresh)
+                                 command=self._menu_enable_refresh,
+                                 state='disabled')
         refresh_menu.add_command(label='Disable auto-refresh',
                                  command=self._menu_disable_refresh)
         menubar.add_cascade(label='IDL events', menu=refresh_menu)
+        self._refresh_menu = refresh_menu
+
+        scope_menu = tkinter.Menu(master=menubar)
+        scope_menu.add_command(label='Monitor only the selected element',
+                               command=self._menu_scope_selected)
+        scope_menu.add_command(label='Add the selected element',
+                               command=self._menu_scope_add_selected)
+        scope_menu.add_separator()
+        scope_menu.add_command(label='Monitor all the elements',
+                               command=self._menu_scope_all)
+        menubar.add_cascade(label='Monitor scope', menu=scope_menu)
+
+        element_menu = tkinter.Menu(master=menubar)
+        element_menu.add_command(label='Where is the selected element used',
+                                 command=self._menu_where_used)
+        element_menu.add_command(label='Find the ACL and QoS rules...',
+                                 command=self._menu_find_rules)
+        menubar.add_cascade(label='Element', menu=element_menu)
+
+        diagnostics_menu = tkinter.Menu(master=menubar)
+        self._diagnostics_enabled = tkinter.BooleanVar(
+            value=instrumentation.enabled())
+        diagnostics_menu.add_checkbutton(
+            label='Record timings', variable=self._diagnostics_enabled,
+            command=self._menu_diagnostics_enable)
+        diagnostics_menu.add_command(label='Show timings...',
+                                     command=self._menu_diagnostics_show)
+        diagnostics_menu.add_command(label='Reset timings',
+                                     command=instrumentation.RECORDER.reset)
+        menubar.add_cascade(label='Diagnostics', menu=diagnostics_menu)
 
     def init_ui(self):
         self._add_menu()
+        self.master.protocol('WM_DELETE_WINDOW', self._menu_exit)
 
         master_frame = tkinter.Frame(master=self.master)
         master_frame.grid(row=1, column=0, columnspan=5, padx=0, pady=0,
@@ -52,12 +303,21 @@ class OvnViewer(tkinter.Frame):
         master_frame.columnconfigure(0, weight=1)
         master_frame.pack(expand=True, fill='both')
 
+        # Search box, on top of the tree.
+        self.search_text = tkinter.StringVar()
+        search_entry = tkinter.Entry(master_frame,
+                                     textvariable=self.search_text,
+                                     font=self._font)
+        search_entry.pack(fill='x')
+        search_entry.bind('<Return>', self._event_search)
+        self.search_text.trace_add('write', self._event_search_changed)
+
         #######################################################################
         style = ttk.Style()
         style.configure('Treeview', font=self._font)
-        self.treeview = ttk.Treeview(master_frame)
-        #self.treeview.option_add("*font", self._font)
-        self.treeview.pack(expand=True, fill='both')
+        # A tab per cluster, see "_add_view".
+        self.notebook = ttk.Notebook(master_frame)
+        self.notebook.pack(expand=True, fill='both')
 
         # Bottom text box.
         self.text_box = tkinter.StringVar()
@@ -66,37 +326,377 @@ class OvnViewer(tkinter.Frame):
                               font=self._font)
         label.pack(side='left')
         self.text_box.set('(no item selected)')
-        self.treeview.bind('<<TreeviewSelect>>', self._event_select)
 
-        self.root_tree = treetypes.RootTree(self.treeview)
-        self._ovn_nb, self._ovn_sb = connection.get_ovn_conn(self.root_tree)
-        self.root_tree.update_ovn_connections(self._ovn_nb, self._ovn_sb)
-        self.root_tree.populate_subtree()
+        if self._diagnostics_log:
+            self.after(constants.DIAGNOSTICS_LOG_INTERVAL,
+                       self._write_diagnostics)
+        if self._offline_db:
+            self._add_view(offline_db=self._offline_db,
+                           offline_name=self._offline_name)
+            return
+
+        self._pool = connection.ConnectionPool()
+        for cluster in self._clusters:
+            self._add_view(cluster=cluster)
 
         #RAH
         #self.treeview.delete()
         a=1
 
+    def _add_view(self, cluster=None, offline_db=None, offline_name=None):
+        """Add a cluster tab and start its connections"""
+        frame = tkinter.Frame(master=self.notebook)
+        treeview = ttk.Treeview(frame)
+        treeview.pack(expand=True, fill='both')
+        treeview.bind('<<TreeviewSelect>>', self._event_select)
+        treeview.bind('<<TreeviewOpen>>', self._event_open)
+        treeview.bind('<Double-1>', self._event_follow_link)
+        view = ClusterView(self, treeview, cluster=cluster, scope=self._scope,
+                           offline_db=offline_db, offline_name=offline_name)
+        self._views[str(frame)] = view
+        self.notebook.add(frame, text=view.name)
+        view.start(self._pool)
+        return frame
+
+    @property
+    def current_view(self):
+        """ClusterView of the selected tab, if any"""
+        if self.notebook is None:
+            return
+        return self._views.get(self.notebook.select())
+
+    @property
+    def root_tree(self):
+        view = self.current_view
+        return view.root_tree if view else None
+
+    @property
+    def treeview(self):
+        view = self.current_view
+        return view.treeview if view else None
+
+    def set_status(self, view, text):
+        """Show a cluster message in the bottom text box"""
+        if len(self._views) > 1:
+            text = '%s: %s' % (view.name, text)
+        self.text_box.set(text)
+
+    def _queued_events(self):
+        return sum(len(view.notifications) for view in self._views.values())
+
+    def _menu_open_cluster(self):
+        if not self._pool:
+            return  # Offline mode.
+        name = simpledialog.askstring('Open cluster', 'Cluster name:',
+                                      parent=self.master)
+        if not name:
+            return
+        if any(view.name == name for view in self._views.values()):
+            self.text_box.set('Cluster %s is already open' % name)
+            return
+        connections = []
+        for schema_name, default in (
+                (constants.OVN_NORTHBOUND, constants.OVN_NB_CONNECTION),
+                (constants.OVN_SOUTHBOUND, constants.OVN_SB_CONNECTION)):
+            connection_string = simpledialog.askstring(
+                'Open cluster', '%s connection (comma separated remotes):' %
+                schema_name, initialvalue=default, parent=self.master)
+            if not connection_string:
+                return
+            connections.append(connection_string)
+        self.notebook.select(self._add_view(
+            cluster=connection.Cluster(name, *connections)))
+
+    def _menu_close_cluster(self):
+        view = self.current_view
+        if not view or not self._pool:
+            return
+        tab = self.notebook.select()
+        view.close()
+        self.notebook.forget(tab)
+        del self._views[tab]
+        self.nametowidget(tab).destroy()
+
+    def _menu_save_snapshot(self):
+        view = self.current_view
+        if not view or not view.tree_built:
+            return
+        path = filedialog.asksaveasfilename(
+            defaultextension='.jsonl', title='Save snapshot',
+            filetypes=[('Snapshot', '*.jsonl'), ('All files', '*')])
+        if path:
+            snapshot.save(view.root_tree.ovn_nb, path)
+
+    def _menu_compare_snapshot(self):
+        """Show the changes from a saved snapshot to the current data"""
+        view = self.current_view
+        if not view or not view.tree_built:
+            return
+        path = filedialog.askopenfilename(
+            title='Compare with a snapshot',
+            filetypes=[('Snapshot', '*.jsonl'), ('All files', '*')])
+        if not path:
+            return
+        try:
+            old_db = cli.load(path)
+        except (OSError, ValueError) as exc:
+            self.text_box.set('Cannot read %s: %s' % (path, exc))
+            return
+        self._show_diff(view, diff.diff(old_db, view.root_tree.ovn_nb),
+                        '%s --> %s' % (path, view.name))
+
+    def _menu_export_graph(self):
+        """Write the graph of the selected element, or of all of them"""
+        view = self.current_view
+        if not view or not view.tree_built:
+            return
+        root_uuid = None
+        tree_item = self.treeview.item(self.treeview.focus())
+        if tree_item['tags']:
+            klass = treetypes.get_tree_type(tree_item['tags'][0])
+            if klass and klass.SCHEMA == constants.OVN_NORTHBOUND:
+                root_uuid = tree_item['values'][0]
+        path = filedialog.asksaveasfilename(
+            defaultextension='.dot', title='Export topology graph',
+            filetypes=[('Graphviz', '*.dot'), ('GraphML', '*.graphml'),
+                       ('All files', '*')])
+        if not path:
+            return
+        output_format = (graph.FORMAT_GRAPHML if path.endswith('.graphml')
+                         else graph.FORMAT_DOT)
+        with open(path, 'w') as output:
+            graph.export(view.root_tree.ovn_nb, output,
+                         output_format=output_format, root_uuid=root_uuid)
+        self.text_box.set('Graph of %s written to %s' %
+                          (root_uuid or 'all the elements', path))
+
+    def _show_diff(self, view, row_diffs, title):
+        """Show the RowDiffs in a new window, a leaf per table and row
+
+        The changed rows have a leaf per changed column. Double click on a
+        row to show it in the main tree.
+        """
+        window = tkinter.Toplevel(master=self.master)
+        window.title(title)
+        treeview = ttk.Treeview(master=window)
+        treeview.pack(expand=True, fill='both')
+        for state, color in constants.DIFF_COLORS.items():
+            treeview.tag_configure(state, background=color)
+
+        counts = {}  # Table leaf --> {state: count}
+        table_leaf = table_name = None
+        for row_diff in row_diffs:
+            if row_diff.table != table_name:
+                table_name = row_diff.table
+                table_leaf = treeview.insert('', 'end', text=table_name)
+                counts[table_leaf] = dict.fromkeys(diff.STATES, 0)
+            counts[table_leaf][row_diff.state] += 1
+            if (sum(counts[table_leaf].values()) >
+                    constants.DIFF_MAX_ROWS):
+                continue
+            uuid = str(row_diff.uuid)
+            leaf = treeview.insert(
+                table_leaf, 'end', text='%s %s' % (
+                    diff.STATE_MARKS[row_diff.state], uuid),
+                tags=row_diff.state, values=uuid)
+            if row_diff.state != diff.CHANGED:
+                continue
+            for column in sorted(row_diff.new):
+                treeview.insert(leaf, 'end', text='%s: %s' % (
+                    column, diff.format_change(row_diff.old[column],
+                                               row_diff.new[column])))
+        for leaf, count in counts.items():
+            treeview.item(leaf, text='%s (%s)' % (
+                treeview.item(leaf, 'text'), ', '.join(
+                    '%d %s' % (count[state], state) for state in
+                    diff.STATES)))
+        if not counts:
+            treeview.insert('', 'end', text='(no changes)')
+
+        def show_element(event):
+            values = treeview.item(treeview.focus(), 'values')
+            leaf = view.root_tree.show_element(values[0]) if values else None
+            if leaf:
+                view.treeview.selection_set(leaf)
+                view.treeview.see(leaf)
+
+        treeview.bind('<Double-1>', show_element)
+
     def _menu_exit(self):
+        for view in self._views.values():
+            view.save_cache()
+            view.close()
+        if self._pool:
+            self._pool.shutdown()
         self.quit()
 
+    def _menu_diagnostics_enable(self):
+        instrumentation.RECORDER.enabled = self._diagnostics_enabled.get()
+
+    def _menu_diagnostics_show(self):
+        window = tkinter.Toplevel(master=self.master)
+        window.title('Diagnostics')
+        text = tkinter.Text(master=window, font=self._font, width=85)
+        text.insert('end', instrumentation.RECORDER.format_stats())
+        text.insert('end', '\n\nIDL events queued: %d' %
+                    self._queued_events())
+        if not instrumentation.enabled():
+            text.insert('end', '\n(recording disabled, see "Diagnostics")')
+        text.config(state='disabled')
+        text.pack(expand=True, fill='both')
+
+    def _write_diagnostics(self):
+        instrumentation.RECORDER.write_json(
+            self._diagnostics_log, queued_events=self._queued_events())
+        self.after(constants.DIAGNOSTICS_LOG_INTERVAL,
+                   self._write_diagnostics)
+
+    @property
+    def auto_refresh(self):
+        """True if the IDL events are applied: enabled and not minimized"""
+        return (self._auto_refresh and
+                self.master.state() not in ('iconic', 'withdrawn'))
+
     def _menu_single_refresh(self):
-        # TODO(ralonsoh): force one single refresh.
-        pass
+        view = self.current_view
+        if view:
+            view.refresh()
+
+    def _set_auto_refresh(self, enabled):
+        self._auto_refresh = enabled
+        self._refresh_menu.entryconfig(
+            'Enable auto-refresh', state='disabled' if enabled else 'normal')
+        self._refresh_menu.entryconfig(
+            'Disable auto-refresh', state='normal' if enabled else 'disabled')
 
     def _menu_enable_refresh(self):
-        # TODO(ralonsoh): enable auto refresh, see OvnIdl.notify
-        pass
+        self._set_auto_refresh(True)
 
     def _menu_disable_refresh(self):
-        # TODO(ralonsoh): enable auto refresh, see OvnIdl.notify
-        pass
+        self._set_auto_refresh(False)
+
+    def _selected_scope_uuid(self):
+        """Return the selected Logical_Switch or Port_Group UUID"""
+        if not self.treeview:
+            return
+        tree_item = self.treeview.item(self.treeview.focus())
+        if not tree_item['tags']:
+            return
+        if tree_item['tags'][0] not in connection.SCOPE_TABLES:
+            return
+        return tree_item['values'][0]
+
+    def _set_scope(self, scope):
+        view = self.current_view
+        if view:
+            view.set_scope(scope)
+
+    def _menu_scope_selected(self):
+        uuid = self._selected_scope_uuid()
+        if uuid:
+            self._set_scope(connection.MonitorScope(uuids=[uuid]))
+
+    def _menu_scope_add_selected(self):
+        uuid = self._selected_scope_uuid()
+        scope = self.current_view.scope if uuid else None
+        if scope:
+            self._set_scope(connection.MonitorScope(
+                uuids=scope.uuids + [uuid],
+                external_ids=scope.external_ids))
+
+    def _menu_scope_all(self):
+        self._set_scope(connection.MonitorScope())
+
+    def _menu_where_used(self):
+        if not self.treeview:
+            return
+        tree_item = self.treeview.item(self.treeview.focus())
+        if not tree_item['tags']:
+            return
+        uuid = tree_item['values'][0]
+        uuids = self.root_tree.where_used(tree_item['tags'][0], uuid)
+        self._show_elements(sorted(str(uuid) for uuid in uuids),
+                            '%s used by' % uuid)
+
+    def _menu_find_rules(self):
+        if not self.root_tree:
+            return
+        query = simpledialog.askstring(
+            'Find the ACL and QoS rules', 'Addresses, ports, port and '
+            'address set names (e.g.: 10.0.0.0/24 tcp/22):',
+            parent=self.master)
+        if not query:
+            return
+        try:
+            uuids = self.root_tree.find_rules(query)
+        except ValueError as exc:
+            self.text_box.set(str(exc))
+            return
+        self._show_elements(sorted(str(uuid) for uuid in uuids),
+                            'Rules matching %s' % query)
+
+    def _show_elements(self, uuids, description):
+        """Open and select the leafs of a list of elements"""
+        leaves = []
+        for uuid in uuids[:constants.SEARCH_MAX_RESULTS]:
+            leaf = self.root_tree.show_element(uuid)
+            if leaf:
+                leaves.append(leaf)
+        if not leaves:
+            self.text_box.set('%s: no matches' % description)
+            return
+        self.treeview.selection_set(leaves)
+        self.treeview.focus(leaves[0])
+        self.treeview.see(leaves[0])
+        if len(uuids) > len(leaves):
+            self.text_box.set('%s: %d matches, showing %d' %
+                              (description, len(uuids), len(leaves)))
 
     def _event_select(self, event):
         selected = event.widget.selection()
-        tree_item = self.treeview.item(selected)
+        if not selected:
+            return
+        tree_item = self.treeview.item(selected[0])
         if not tree_item['tags']:
             return
         uuid = tree_item['values'][0]
         ovn_item_type = tree_item['tags'][0]
         self.root_tree.print_on_text_box(self.text_box, ovn_item_type, uuid)
+
+    def _event_open(self, event):
+        self.root_tree.expand_leaf(self.treeview.focus())
+
+    def _event_follow_link(self, event):
+        """Show the related element (e.g.: the Port_Binding of a port)"""
+        tree_item = self.treeview.item(self.treeview.focus())
+        if not tree_item['tags']:
+            return
+        linked_uuid = self.root_tree.get_linked_uuid(tree_item['tags'][0],
+                                                     tree_item['values'][0])
+        if not linked_uuid:
+            return
+        leaf = self.root_tree.show_element(linked_uuid)
+        if leaf:
+            self.treeview.selection_set(leaf)
+            self.treeview.focus(leaf)
+            self.treeview.see(leaf)
+
+    def _event_search_changed(self, *args):
+        text = self.search_text.get()
+        if len(text.strip()) < constants.SEARCH_MIN_LENGTH or not (
+                self.root_tree and self.root_tree.ovn_nb):
+            return
+        if not self.root_tree.search_index_built:
+            self.text_box.set('"%s": indexing (press Return to search)' %
+                              text)
+            return
+        self.text_box.set('"%s": %d matches (press Return to show them)' %
+                          (text, len(self.root_tree.search(text))))
+
+    def _event_search(self, event):
+        text = self.search_text.get()
+        if not text.strip() or not (self.root_tree and
+                                    self.root_tree.ovn_nb):
+            return
+        uuids = sorted(str(uuid) for uuid in self.root_tree.search(text))
+        self._show_elements(uuids, '"%s"' % text)